@@ -0,0 +1,351 @@
+"""Benchmarks for the questionnaire engine and prompters, driven by synthetic
+prompters like the ones in `tests`.
+
+Usage: from repo root, run `python -m benchmarks.bench --output results.json`.
+Pass `--compare baseline.json` to compare against the results of an earlier
+run, and `--sizes 10 100` to change the number of questions in each benchmark.
+
+Benchmarks that show answers in each prompt are quadratic in the number of
+questions, so sizes above 10000 are only run if passed with `--sizes`.
+"""
+from __future__ import print_function
+import argparse
+import json
+import platform
+import sys
+import time
+from random import Random
+
+from questionnaire import Questionnaire, Options
+from questionnaire.picker import Picker
+
+timer = getattr(time, 'perf_counter', time.time)
+
+SIZES = (10, 100, 1000, 10000)
+benchmarks = []
+
+
+def benchmark(func):
+    benchmarks.append(func)
+    return func
+
+
+def memory_benchmark(func):
+    """Registers benchmark that returns bytes allocated instead of seconds.
+    """
+    func.unit = 'B'
+    return benchmark(func)
+
+
+def linear(n, **kwargs):
+    q = Questionnaire(**kwargs)
+    for i in range(n):
+        q.add('k{}'.format(i), prompter=lambda prompt: 'v')
+    return q
+
+
+def conditional(n, **kwargs):
+    """Each key has two questions, with conditions on the answer to the previous
+    key, so each answer determines which question is asked next.
+    """
+    random = Random(n)
+
+    def prompter(prompt):
+        return random.choice('ab')
+
+    q = Questionnaire(**kwargs)
+    q.add('k0', prompter=prompter)
+    for i in range(1, n):
+        previous = 'k{}'.format(i - 1)
+        q.add('k{}'.format(i), prompter=prompter).condition((previous, 'a'))
+        q.add('k{}'.format(i), prompter=prompter).condition((previous, 'b'), (previous, 'c', '!='))
+    return q
+
+
+@benchmark
+def run_linear(n):
+    q = linear(n)
+    start = timer()
+    q.run()
+    return timer() - start
+
+
+@benchmark
+def run_linear_hidden(n):
+    """Like `run_linear`, without building the answer display for each prompt.
+    """
+    q = linear(n, show_answers=False)
+    start = timer()
+    q.run()
+    return timer() - start
+
+
+@benchmark
+def run_conditional(n):
+    q = conditional(n, show_answers=False)
+    start = timer()
+    q.run()
+    return timer() - start
+
+
+@benchmark
+def go_back_storm(n):
+    """Answer all questions, then alternate between going back and answering
+    again, n times.
+    """
+    q = linear(n, show_answers=False)
+    q.run()
+    random = Random(n)
+    start = timer()
+    for _ in range(n):
+        q.go_back(random.randint(1, 3))
+        q.run()
+    return timer() - start
+
+
+@benchmark
+def get_prompt(n):
+    """Build the prompt for the last question n times, with n answers shown.
+    """
+    q = linear(n + 1)
+    for _ in range(n):
+        q.submit('v')
+    question = q.next_question
+    start = timer()
+    for _ in range(min(n, 1000)):
+        q.get_prompt(question, error='error')
+    return timer() - start
+
+
+@benchmark
+def get_prompt_after_answer(n):
+    """Build the prompt after each answer, like `run` does when answers are
+    shown.
+    """
+    q = linear(n)
+    start = timer()
+    while not q.done:
+        q.get_prompt(q.next_question)
+        q.ask()
+    return timer() - start
+
+
+@benchmark
+def options(n):
+    """Build options from n (value, label) tuples and read the first screen.
+    """
+    args = [('v{}'.format(i), 'label {}'.format(i)) for i in range(n)]
+    start = timer()
+    options = Options(args)
+    for i in range(min(n, 50)):
+        options.value(i), options.label(i)
+    return timer() - start
+
+
+@benchmark
+def many_toggles(n):
+    """Toggle 100 options in a picker with n options, then choose `done`.
+    """
+    options = Options(['option {}'.format(i) for i in range(n)])
+    keys = [ord(' '), ord('j')] * 100 + [ord('G'), ord('\n')]
+    picker = Picker(options, title='title', chosen=set())
+    picker.screen = FakeScreen(keys)
+    start = timer()
+    picker.layout()
+    picker.draw()
+    picker.run_loop()
+    return timer() - start
+
+
+@benchmark
+def filter_options(n):
+    """Type a query one character at a time in a picker with n options.
+    """
+    options = Options(['option {}'.format(i) for i in range(n)])
+    keys = [ord(c) for c in '/option 1'] + [ord('\n')]
+    picker = Picker(options, title='title')
+    picker.screen = FakeScreen(keys)
+    start = timer()
+    picker.layout()
+    picker.draw()
+    picker.run_loop()
+    return timer() - start
+
+
+@benchmark
+def condition_masks(n):
+    """Evaluate conditions of a questionnaire with 10 keys for n records.
+    """
+    from questionnaire.columns import condition_masks
+    q = conditional(10)
+    random = Random(n)
+    table = {'k{}'.format(i): [random.choice('abc') for _ in range(n)] for i in range(10)}
+    start = timer()
+    condition_masks(q, table)
+    return timer() - start
+
+
+@benchmark
+def format_answers(n):
+    q = linear(n, show_answers=False)
+    q.run()
+    start = timer()
+    for fmt in ('obj', 'array', 'plain'):
+        q.format_answers(fmt)
+    return timer() - start
+
+
+def generated(n, pooled=False, shared=True):
+    """Questionnaire like one generated from a survey, where each question has
+    a prompt, a condition on the previous answer, and the same 20 options. If
+    `shared` is false, each question gets its own copy of the options and its
+    prompt. Questions still have `__slots__` and interned keys, so this only
+    undoes the sharing of options and prompts, not the rest of the changes that
+    made questions smaller.
+    """
+    choices = ['option {}'.format(i) for i in range(20)]
+    q = Questionnaire()
+    shared_options = q.options(*choices) if pooled else None
+    for i in range(n):
+        key = 'k{}'.format(i)
+        question = q.one(key, *([shared_options] if pooled else choices), prompt='Question {}?'.format(i % 100))
+        if not shared:
+            question.prompter_args = tuple(''.join(['option ', str(j)]) for j in range(20))
+            question._prompt = ''.join(['Question ', str(i % 100), '?'])
+            question.prompt = question.format_prompt()
+        if i:
+            question.condition(('k{}'.format(i - 1), 'option 0', '!='))
+    return q
+
+
+def allocated(build, n):
+    """Returns bytes allocated by `build(n)` that are still in use after it
+    returns.
+    """
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build(n)  # noqa: F841, keep result alive until memory is measured
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+@memory_benchmark
+def memory_questions_unshared(n):
+    """Memory used by n questions that each have their own options and prompt.
+    Compared with `memory_questions`, it only measures what sharing options and
+    prompts saves: questions have `__slots__` in both.
+    """
+    return allocated(lambda n: generated(n, shared=False), n)
+
+
+@memory_benchmark
+def memory_questions(n):
+    """Memory used by n questions, each passed the same options as `*args`.
+    """
+    return allocated(generated, n)
+
+
+@memory_benchmark
+def memory_questions_pooled(n):
+    """Like `memory_questions`, with options shared through `Questionnaire.options`.
+    """
+    return allocated(lambda n: generated(n, pooled=True), n)
+
+
+class FakeScreen:
+    """Stands in for a curses window, and feeds keys to a picker.
+    """
+    def __init__(self, keys, height=40, width=80):
+        self.keys = list(reversed(keys))
+        self.size = (height, width)
+
+    def getch(self):
+        return self.keys.pop()
+
+    def getmaxyx(self):
+        return self.size
+
+    def addnstr(self, y, x, line, n):
+        pass
+
+    def move(self, y, x):
+        pass
+
+    def clear(self):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def run(sizes, repeat, names=None):
+    """Returns best time in seconds, or fewest bytes for memory benchmarks, for
+    each benchmark and size.
+    """
+    results = {}
+    for func in benchmarks:
+        if names and func.__name__ not in names:
+            continue
+        for n in sizes:
+            best = min(func(n) for _ in range(repeat))
+            results['{}[{}]'.format(func.__name__, n)] = best
+            if getattr(func, 'unit', 's') == 's':
+                print('{:>32} {:>12.6f}s'.format('{}[{}]'.format(func.__name__, n), best))
+            else:
+                print('{:>32} {:>12}{}'.format('{}[{}]'.format(func.__name__, n), best, func.unit))
+            sys.stdout.flush()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints ratio of each result to baseline, and returns names of benchmarks
+    that are slower than baseline by more than `threshold`.
+    """
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print('{:>32} {:>8.2f}x{}'.format(name, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark questionnaire.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', help='names of benchmarks to run')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='compare results to this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown flagged as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.only)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': time.time(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
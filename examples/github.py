@@ -1,4 +1,4 @@
-from questionnaire import Questionnaire
+from questionnaire import Questionnaire, Options
 import requests
 
 q = Questionnaire(show_answers=False, can_go_back=False)
@@ -13,6 +13,6 @@ if not(r.ok):
     sys.exit()
 
 repos = [repo.get('url') for repo in r.json()]
-q.one('repo', *repos, prompt='Choose a repo')
+q.one('repo', Options(repos), prompt='Choose a repo')
 q.run()
 print(q.answers.get('repo'))
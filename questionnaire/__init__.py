@@ -1,18 +1,46 @@
 # -*- coding: utf-8 -*-
 import operator
-import inspect
 import json
+import os
 import sys
+import weakref
 from collections import namedtuple, OrderedDict
-from itertools import islice
+from contextlib import contextmanager
 from functools import wraps
 
-from .prompters import prompters, eprint, QuestionnaireGoBack, is_string
+from .prompters import prompters, eprint, QuestionnaireGoBack, Options, is_lazy, is_string, \
+    stdout_redirection, headless, NO_ANSWER  # noqa: F401
+from .session import Definition, Session
+from .stream import AnswerStream
+from .timing import clock
 
 
 Cond = namedtuple('Cond', 'key, value, operator')
 
 
+def intern_string(s):
+    """Returns interned copy of `s` if it's a `str`, so equal keys and prompts
+    of different questions share memory.
+    """
+    if type(s) is not str:
+        return s
+    return sys.intern(s) if sys.version_info >= (3, 0) else intern(s)  # noqa: F821
+
+
+def poolable(options):
+    """Returns `True` if `options` can be shared by questions that are passed
+    equal options. Other options, e.g. `1` and `True`, can be equal without
+    being the same.
+    """
+    return all(is_string(o) or isinstance(o, tuple) and all(is_string(x) for x in o) for o in options)
+
+
+class QuestionnaireInvalidAnswer(Exception):
+    """Signals a question was answered with an invalid answer too many times.
+    Args are the question's key and the last validation error.
+    """
+
+
 def exit_on_keyboard_interrupt(f):
     """Decorator that allows user to exit script by sending a keyboard interrupt
     (ctrl + c) without raising an exception.
@@ -29,9 +57,58 @@ def exit_on_keyboard_interrupt(f):
     return wrapper
 
 
-class Condition:
-    """Container for condition properties.
+operators = {}  # name -> custom operator function, see `register_operator`
+_valid_operators = weakref.WeakKeyDictionary()  # custom operator functions that have been checked
+
+
+def register_operator(name, func=None):
+    """Registers custom operator `func`, so conditions can refer to it by `name`.
+    The operator is checked once, when it's registered. Can be used as a
+    decorator.
+    """
+    def decorate(func):
+        operators[name] = check_operator(func)
+        return func
+    return decorate if func is None else decorate(func)
+
+
+def check_operator(op):
+    """Returns `op` if it can be called with two args, else prints an error and
+    raises `TypeError`. Functions that pass are cached, so each is only checked
+    once.
+    """
+    try:
+        if op in _valid_operators:
+            return op
+    except TypeError:  # can't be weakly referenced, so can't be cached
+        pass
+    import inspect  # slow to import, and only needed for custom operators
+    try:
+        if not callable(op):
+            raise TypeError('{!r} is not callable'.format(op))
+        if hasattr(inspect, 'signature'):
+            try:
+                signature = inspect.signature(op)
+            except ValueError:  # some builtins have no signature
+                signature = None
+            if signature is not None:
+                signature.bind(None, None)  # raises `TypeError` if `op` can't be called with two args
+        elif len(inspect.getargspec(op)[0]) != 2:
+            raise TypeError('operator must accept two args')
+    except TypeError:
+        eprint('Error: invalid operator function. Operators must accept two args.')
+        raise
+    try:
+        _valid_operators[op] = True
+    except TypeError:
+        pass
+    return op
+
+
+class Condition(object):
+    """Container for condition properties. `conditions` is a tuple of `Cond`.
     """
+    __slots__ = ('conditions',)
     OPERATORS = {
         '==': operator.eq,
         '!=': operator.ne,
@@ -42,43 +119,167 @@ class Condition:
     }
 
     def __init__(self, *args):
-        self.conditions = []
+        conditions = []
         for condition in args:
             if len(condition) == 2:
                 condition = list(condition) + ['==']
             key, value, operator = condition
-            self.conditions.append(Cond(key, value, self.get_operator(operator)))
+            conditions.append(Cond(intern_string(key), value, self.get_operator(operator)))
+        self.conditions = tuple(conditions)
 
     def get_operator(self, op):
-        """Assigns function to the operators property of the instance.
+        """Returns operator function for `op`, which is the name of a built-in
+        or registered operator, or an operator function.
         """
-        if op in self.OPERATORS:
-            return self.OPERATORS.get(op)
-        try:
-            n_args = len(inspect.getargspec(op)[0])
-            if n_args != 2:
-                raise TypeError
-        except:
-            eprint('Error: invalid operator function. Operators must accept two args.')
-            raise
-        else:
-            return op
+        if is_string(op):
+            if op in self.OPERATORS:
+                return self.OPERATORS[op]
+            if op in operators:
+                return operators[op]
+            eprint("Error: '{}' is not a built-in or registered operator".format(op))
+            raise KeyError(op)
+        return check_operator(op)
+
+    def __reduce__(self):
+        """Pickles registered operators by name, so they needn't be picklable,
+        and an unpickled condition uses the operator registered under the name
+        when it's unpickled.
+        """
+        names = {id(f): name for name, f in operators.items()}
+        conditions = tuple((c.key, c.value, names.get(id(c.operator), c.operator)) for c in self.conditions)
+        return _unpickle_condition, (conditions,)
+
+
+def _unpickle_condition(conditions):
+    """Returns a `Condition` pickled by `Condition.__reduce__`. Raises `KeyError`
+    if an operator is no longer registered.
+    """
+    condition = Condition.__new__(Condition)
+    condition.conditions = tuple(Cond(intern_string(key), value, operators[op] if is_string(op) else op)
+                                 for key, value, op in conditions)
+    return condition
+
+
+_changes = [0]  # number of changes to questions and their conditions, see `Questionnaire.compile`
+
+
+def questions_changed():
+    _changes[0] += 1
+
+
+class QuestionList(list):
+    """List of the questions for a key in `Questionnaire.questions`. Changing it
+    makes questionnaires compile their questions again.
+    """
+    def append(self, question):
+        questions_changed()
+        list.append(self, question)
+
+    def extend(self, questions):
+        questions_changed()
+        list.extend(self, questions)
 
+    def insert(self, i, question):
+        questions_changed()
+        list.insert(self, i, question)
 
-class Question:
+    def remove(self, question):
+        questions_changed()
+        list.remove(self, question)
+
+    def pop(self, *i):
+        questions_changed()
+        return list.pop(self, *i)
+
+    def sort(self, *args, **kwargs):
+        questions_changed()
+        list.sort(self, *args, **kwargs)
+
+    def reverse(self):
+        questions_changed()
+        list.reverse(self)
+
+    def clear(self):
+        questions_changed()
+        del self[:]
+
+    def __setitem__(self, i, value):
+        questions_changed()
+        list.__setitem__(self, i, value)
+
+    def __delitem__(self, i):
+        questions_changed()
+        list.__delitem__(self, i)
+
+    def __setslice__(self, i, j, values):  # Python 2
+        questions_changed()
+        list.__setslice__(self, i, j, values)
+
+    def __delslice__(self, i, j):  # Python 2
+        questions_changed()
+        list.__delslice__(self, i, j)
+
+    def __iadd__(self, questions):
+        questions_changed()
+        return list.__iadd__(self, questions)
+
+
+class Questions(OrderedDict):
+    """`Questionnaire.questions`, mapping each key to a `QuestionList`. Changing
+    it, or its lists, makes questionnaires compile their questions again.
+    """
+    def __setitem__(self, key, questions):
+        questions_changed()
+        OrderedDict.__setitem__(self, key, questions if isinstance(questions, QuestionList) else
+                                QuestionList(questions))
+
+    def __delitem__(self, key):
+        questions_changed()
+        OrderedDict.__delitem__(self, key)
+
+    def pop(self, key, *default):
+        questions_changed()
+        return OrderedDict.pop(self, key, *default)
+
+    def popitem(self, last=True):
+        questions_changed()
+        return OrderedDict.popitem(self, last)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, questions in OrderedDict(*args, **kwargs).items():
+            self[key] = questions
+
+    def clear(self):
+        questions_changed()
+        OrderedDict.clear(self)
+
+
+class Question(object):
     """Container for question properties. A string key will look up the
     prompter in the core prompters registry, or you can pass your own
     prompter method that conforms to the prompter API.
+
+    Questions have `__slots__`, and their keys and prompts are interned, so
+    questionnaires with many questions stay small.
     """
+    __slots__ = ('key', 'prompter', 'prompt', '_prompt', 'prompter_args', 'prompter_kwargs',
+                 '_condition', '_validate', '_transform', '_cache')
+
     def __init__(self, key, *args, **kwargs):
-        self.key = key
+        self.key = intern_string(key)
         self._condition = None
         self._validate = None
         self._transform = None
+        self._cache = None
         self.assign_prompter(kwargs.pop('prompter'))  # `prompter` required
         self.assign_prompt(kwargs.pop('prompt', None), kwargs.get('default', None))  # `prompt`, `default` optional
         self.prompter_args = args
-        self.prompter_kwargs = kwargs
+        self.prompter_kwargs = kwargs or {}  # new empty dict is smaller than one that had `prompter` popped
 
     def assign_prompter(self, prompter):
         """If you want to change the core prompters registry, you can
@@ -93,12 +294,18 @@ class Question:
             self.prompter = prompter
 
     def assign_prompt(self, prompt, default=None):
-        self.prompt = prompt.strip() + ' ' if prompt else '{}: '.format(self.key)
+        self._prompt = intern_string(prompt)
+        self.prompt = intern_string(self.format_prompt(default))
+
+    def format_prompt(self, default=None):
+        prompt = self._prompt.strip() + ' ' if self._prompt else '{}: '.format(self.key)
         if default is not None:
-            self.prompt += '[{}] '.format(default)
+            prompt += '[{}] '.format(default)
+        return prompt
 
     def condition(self, *args):
         self._condition = Condition(*args)
+        questions_changed()  # conditions are indexed when questions are compiled
         return self
 
     def validate(self, f):
@@ -109,17 +316,119 @@ class Question:
         self._transform = f
         return self
 
+    def cache(self, size=128, prefill=True):
+        """Caches up to `size` results of the question's validator and transform,
+        reuses its options each time it's asked, and if `prefill` is true,
+        pre-fills the last answer when it's asked again. See `cache`.
+        """
+        from .cache import QuestionCache
+        self._cache = QuestionCache(size, prefill)
+        self._cache.prepare(self)
+        questions_changed()  # options are indexed when questions are compiled
+        return self
+
+    def invalidate(self, *answers):
+        """Drops cached results for `answers`, or everything cached for the
+        question, if no answers are passed. Options from an options function are
+        fetched again the next time they're shown.
+        """
+        if self._cache is None:
+            return
+        if answers:
+            for answer in answers:
+                self._cache.clear(answer)
+            return
+        self._cache.clear()
+        self._cache.refresh(self)
+
+    def coerce(self, answer=NO_ANSWER, args=None):
+        """Returns `answer` as the question's prompter would have returned it,
+        for answering the question without prompting. Pass `args` to coerce it
+        with args other than `prompter_args`, e.g. a session's options. See
+        `prompters.headless`.
+        """
+        return headless(self.prompter, answer, self.prompter_args if args is None else args, self.prompter_kwargs)
 
-class Questionnaire:
+    def process(self, answer, validate=None, transform=None):
+        """Returns `(error, answer)`, with the validation error if the answer is
+        invalid, or `None` and the transformed answer. Pass `validate` and
+        `transform` to call them instead of the question's.
+        """
+        error = self.check(answer, validate)
+        if error:
+            return error, None
+        return None, self.convert(answer, transform)
+
+    def check(self, answer, validate=None):
+        """Returns validation error for `answer`, or `None` if it's valid.
+        """
+        validate = validate or self._validate
+        if not validate:
+            return None
+        return self._cache.call('validate', validate, answer) if self._cache else validate(answer)
+
+    def convert(self, answer, transform=None):
+        """Returns valid `answer` transformed.
+        """
+        transform = transform or self._transform
+        if not transform:
+            return answer
+        return self._cache.call('transform', transform, answer) if self._cache else transform(answer)
+
+
+class Questionnaire(object):
     """Class with methods for adding questions to a questionnaire, and running
     the questionnaire. Additional keyword args are passed to the prompter
     method when it is called.
+
+    Questions are compiled into a `Definition`, and answers are held by a
+    `Session` (see `session`).
     """
-    def __init__(self, show_answers=True, can_go_back=True):
-        self.questions = OrderedDict()  # key -> list of Question instances
-        self.answers = OrderedDict()  # key -> answer
+    def __init__(self, show_answers=True, can_go_back=True, history_size=None, max_answers_shown=None, prefetch=1,
+                 max_retries=None, on_error=None, renderer=None):
+        self.questions = Questions()  # key -> list of Question instances
+        self._definition = None  # compiled lazily, because conditions are chained onto questions after they're added
+        self._compiled = None  # value of `_changes` when questions were compiled
+        self._session = Session(history_size=history_size)
         self.show_answers = show_answers
         self.can_go_back = can_go_back
+        self.max_answers_shown = max_answers_shown  # show only the last N answers, `None` for all
+        self.prefetch = prefetch  # number of upcoming questions whose lazy options are prefetched
+        self.max_retries = max_retries  # max invalid answers to a question before giving up, `None` for no limit
+        self.on_error = on_error  # called with question, answer and error for each invalid answer
+        self.listeners = []  # called with event, question key and seconds, see `timing`
+        self.renderer = renderer  # 'ansi' or an `ansi.Terminal` for core prompters to draw on, `None` for curses
+        self._terminal = None
+        self._stream = None
+        self._checkpoint = None
+        self._options_pool = {}  # options args -> same args, shared by all questions passed equal options
+
+    @property
+    def session(self):
+        """Session bound to the current definition of the questionnaire.
+        """
+        definition = self.compile()
+        if self._session.definition is not definition:
+            self._session.bind(definition)
+        return self._session
+
+    def compile(self):
+        """Returns the `Definition` of the questionnaire's questions, which can
+        be shared by many sessions. Questions are compiled again if they, or
+        their conditions, changed since they were compiled.
+        """
+        if self._definition is None or self._compiled != _changes[0]:
+            self._definition = Definition(self.questions)
+            self._compiled = _changes[0]
+        return self._definition
+
+    @property
+    def answers(self):
+        return self._session.answers
+
+    @answers.setter
+    def answers(self, answers):
+        self._session.reset(answers)
 
     def add(self, *args, **kwargs):
         """Add a Question instance to the questions dict. Each key points
@@ -132,15 +441,54 @@ class Questionnaire:
         else:
             question = Question(*args, **kwargs)
         self.questions.setdefault(question.key, []).append(question)
+        self._definition = None
         return question
 
-    def one(self, *args, **kwargs):
+    def one(self, key, *args, **kwargs):
         kwargs['prompter'] = 'one'
-        return self.add(*args, **kwargs)
+        return self._add_options_question(key, args, kwargs)
 
-    def many(self, *args, **kwargs):
+    def many(self, key, *args, **kwargs):
         kwargs['prompter'] = 'many'
-        return self.add(*args, **kwargs)
+        return self._add_options_question(key, args, kwargs)
+
+    def _add_options_question(self, key, args, kwargs):
+        args = self._lazy_options(args)
+        question = self.add(key, *args, **kwargs)
+        question.prompter_args = args  # `add` packs args into a new tuple, keep the one from the pool
+        return question
+
+    def _lazy_options(self, args):
+        """Wraps an options function or iterator in `Options` once, so options
+        aren't fetched again each time the question is asked, and so they can be
+        prefetched. Options that are strings or tuples of strings are looked up in
+        the options pool, so questions passed equal options share the same tuple.
+        """
+        if len(args) == 1 and is_lazy(args[0]):
+            return (Options(args[0]),)
+        if len(args) == 1 and isinstance(args[0], Options) or poolable(args):
+            return self._options_pool.setdefault(args, args)
+        return args
+
+    def options(self, *options):
+        """Returns `Options` for `options` that are shared by every question of
+        the questionnaire that's passed them. Pass the result to `one` or `many`
+        to avoid keeping a copy of a big set of options for each question:
+
+            days = q.options('monday', 'friday', 'saturday')
+            q.one('start', days)
+            q.one('end', days)
+
+        Calling `options` again with equal options returns the same instance, as
+        long as all options are strings or tuples of strings.
+        """
+        if not poolable(options):
+            return Options(options)
+        key = (Options,) + options
+        shared = self._options_pool.get(key)
+        if shared is None:
+            shared = self._options_pool[key] = Options(options)
+        return shared
 
     def raw(self, *args, **kwargs):
         kwargs['prompter'] = 'raw'
@@ -150,42 +498,221 @@ class Questionnaire:
         """Remove all questions associated with `key`. Raises exception if `key`
         doesn't exist.
         """
-        return self.questions.pop(key)
+        questions = self.questions.pop(key)
+        self._definition = None
+        return questions
 
     def run(self):
         """Asks all remaining questions in the questionnaire, returns the answers.
         """
-        while not self.done:
-            self.ask()
+        terminal = self.terminal
+        if terminal is None:
+            with stdout_redirection.held():  # redirect stdout once for all prompters, instead of once per prompt
+                while not self.done:
+                    self.ask()
+            return self.answers
+        with terminal:  # keep screen open between questions, so only what changes is redrawn
+            while not self.done:
+                self.ask()
         return self.answers
 
+    @property
+    def terminal(self):
+        """`ansi.Terminal` the core prompters draw on, or `None` if they use
+        curses. See `renderer`.
+        """
+        if self.renderer is None:
+            return None
+        if self.renderer == 'ansi':
+            if self._terminal is None:
+                from .ansi import Terminal
+                self._terminal = Terminal()
+            return self._terminal
+        return self.renderer
+
+    def prompter_args(self, question):
+        """Args the question's prompter is called with, see
+        `Session.prompter_args`.
+        """
+        return self.session.prompter_args(question)
+
+    def prompter_kwargs(self, question):
+        """Kwargs the question's prompter is called with. Core prompters are also
+        passed the terminal to draw on, if there is one, and the last answer is
+        pre-filled if the question is cached.
+        """
+        kwargs = question.prompter_kwargs
+        if question in self._session.given:
+            kwargs = question._cache.prefilled(question, self.prompter_args(question), kwargs,
+                                               self._session.given[question])
+        if not self.draws_on_terminal(question):
+            return kwargs
+        return dict(kwargs, renderer=self.terminal)
+
+    def draws_on_terminal(self, question):
+        """Returns `True` if the question's prompter draws on the terminal, i.e.
+        there's a terminal and the prompter is a core prompter.
+        """
+        core = (prompters['one'], prompters['many'], prompters['raw'])
+        return self.terminal is not None and question.prompter in core
+
+    @contextmanager
+    def prompting(self, question):
+        """Context for calling the question's prompter. The terminal is suspended
+        for prompters that don't draw on it, so they get the screen and tty
+        settings they'd get without it.
+        """
+        if self.terminal is None or self.draws_on_terminal(question):
+            yield
+            return
+        with self.terminal.suspended():
+            yield
+
     @exit_on_keyboard_interrupt
     def ask(self, error=None):
         """Asks the next question in the questionnaire and returns the answer,
-        unless user goes back.
+        unless user goes back. The question is asked again, with the error shown
+        above the prompt, until the answer is valid or `max_retries` is exceeded.
         """
-        q = self.next_question
-        if q is None:
-            return
-
+        retries, q, start = 0, None, clock() if self.listeners else None
         try:
-            answer = q.prompter(self.get_prompt(q, error), *q.prompter_args, **q.prompter_kwargs)
-        except QuestionnaireGoBack as e:
-            steps = e.args[0] if e.args else 1
-            if steps == 0:
-                self.ask()  # user can redo current question even if `can_go_back` is `False`
-                return
-            self.go_back(steps)
-        else:
-            if q._validate:
-                error = q._validate(answer)
-                if error:
-                    self.ask(error)
+            while True:
+                q = self.next_question
+                if q is None:
                     return
-            if q._transform:
-                answer = q._transform(answer)
-            self.answers[q.key] = answer
-            return answer
+
+                prompter = q.prompter if start is None else self.timed('prompt', q.key, q.prompter)
+                try:
+                    with self.prompting(q):
+                        answer = prompter(self.get_prompt(q, error), *self.prompter_args(q), **self.prompter_kwargs(q))
+                except QuestionnaireGoBack as e:
+                    steps = e.args[0] if e.args else 1
+                    if steps == 0:
+                        error = None  # user can redo current question even if `can_go_back` is `False`
+                        continue
+                    self.go_back(steps)
+                    return
+
+                error = self.submit(answer, q)
+                if not error:
+                    return self.answers[q.key]
+                retries += 1
+                self.invalid_answer(q, answer, error, retries)
+        finally:
+            if start is not None and q is not None:
+                self.emit('ask', q.key, clock() - start)
+
+    def invalid_answer(self, question, answer, error, retries):
+        """Called each time an answer fails validation. Calls the `on_error` hook,
+        and raises `QuestionnaireInvalidAnswer` if the question has had more than
+        `max_retries` invalid answers in a row.
+        """
+        if self.on_error:
+            self.on_error(question, answer, error)
+        if self.max_retries is not None and retries > self.max_retries:
+            raise QuestionnaireInvalidAnswer(question.key, error)
+
+    def listen(self, listener):
+        """Registers `listener` to be called with the name, question key and
+        duration in seconds of each step of asking questions, and returns it. See
+        `timing` for the events. Nothing is timed if there are no listeners.
+        """
+        self.listeners.append(listener)
+        return listener
+
+    def emit(self, event, key, seconds):
+        for listener in self.listeners:
+            listener(event, key, seconds)
+
+    def timed(self, event, key, f):
+        """Returns a function that calls `f` and emits `event` with the time it
+        took.
+        """
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self.emit(event, key, clock() - start)
+        return wrapper
+
+    def stream_answers(self, f):
+        """Writes each answer to file object `f` as a line of JSON as soon as
+        it's given, and a retraction each time an answer is removed, e.g. by
+        going back. See `stream` for the format. Pass `None` to stop streaming.
+        Returns the `AnswerStream`.
+        """
+        outputs = self._session.outputs
+        if self._stream is not None:
+            outputs.remove(self._stream)
+        self._stream = None if f is None else AnswerStream(f)
+        if self._stream is not None:
+            outputs.append(self._stream)
+            if self.answers:
+                self._stream.reset(self.answers)
+        return self._stream
+
+    def checkpoint(self, path, compact_every=500):
+        """Saves answers and undo history to the file at `path`, replacing it,
+        and again after each answer, so the questionnaire can be resumed with
+        `resume` if it's interrupted. See `checkpoint` for details. Pass `None`
+        to stop saving answers. Returns the `Checkpoint`.
+        """
+        from .checkpoint import Checkpoint
+        outputs = self._session.outputs
+        if self._checkpoint is not None:
+            outputs.remove(self._checkpoint)
+            self._checkpoint.close()
+        self._checkpoint = None if path is None else Checkpoint(self._session, path, compact_every)
+        if self._checkpoint is not None:
+            outputs.append(self._checkpoint)
+        return self._checkpoint
+
+    def resume(self, path, compact_every=500):
+        """Restores answers and undo history saved by `checkpoint` to the file
+        at `path`, if it exists, without prompting the user, and keeps saving
+        answers to it. Returns the answers.
+        """
+        from .checkpoint import replay
+        if os.path.exists(path):
+            with open(path) as f:
+                replay(self.session, f)
+            if self._stream is not None:
+                self._stream.reset(self.answers)
+        self.checkpoint(path, compact_every)
+        return self.answers
+
+    def arun(self):
+        """Returns a coroutine that asks all remaining questions, like `run`.
+        Prompters, validators and transforms can be coroutine functions. See
+        `aio` for details.
+        """
+        from .aio import arun
+        return arun(self)
+
+    def aask(self):
+        """Returns a coroutine that asks the next question, like `ask`.
+        """
+        from .aio import aask
+        return aask(self)
+
+    def submit(self, answer, question=None):
+        """Answers `question`, or the next question, with `answer` instead of
+        prompting the user. The answer is validated and transformed just like an
+        answer from a prompter. Returns the validation error if the answer is
+        invalid, in which case it isn't recorded. Raises `ValueError` if there's
+        no question to answer.
+        """
+        session = self.session
+        if not self.listeners:
+            return session.submit(answer, question)
+        q = session.question_to_answer(question)
+        error, transformed = q.process(answer, q._validate and self.timed('validate', q.key, q._validate),
+                                       q._transform and self.timed('transform', q.key, q._transform))
+        if error:
+            return error
+        session.remember(q, answer)
+        session.accept(transformed, q)
 
     def get_prompt(self, question, error=None):
         parts = []
@@ -193,7 +720,10 @@ class Questionnaire:
             parts.append(self.answer_display())
         if error:
             parts.append(error)
-        parts.append(question.prompt)
+        if question in self._session.given:
+            parts.append(question._cache.prompt(question, self._session.given[question]))
+        else:
+            parts.append(question.prompt)
         return '\n\n'.join(str(p) for p in parts)
 
     @property
@@ -203,24 +733,19 @@ class Questionnaire:
         answer and for which condition is satisfied, or for which there is no
         condition.
         """
-        for key, questions in self.questions.items():
-            if key in self.answers:
-                continue
-            for question in questions:
-                if self.check_condition(question._condition):
-                    return question
-        return None
+        session = self.session
+        start = clock() if self.listeners else None
+        question = session.next_question
+        if start is not None:
+            self.emit('next_question', None if question is None else question.key, clock() - start)
+        if question is not None and self.prefetch:
+            session.prefetch(self.prefetch)
+        return question
 
     def check_condition(self, condition):
         """Helper that returns True if condition is satisfied/doesn't exist.
         """
-        if not condition:
-            return True
-        for c in condition.conditions:
-            key, value, operator = c
-            if not operator(self.answers[key], value):
-                return False
-        return True
+        return self._session.check_condition(condition)
 
     def go_back(self, n=1):
         """Move `n` questions back in the questionnaire by removing the last `n`
@@ -228,15 +753,112 @@ class Questionnaire:
         """
         if not self.can_go_back:
             return
-        N = max(len(self.answers)-abs(n), 0)
-        self.answers = OrderedDict(islice(self.answers.items(), N))
+        self.session.go_back(n)
+
+    def redo(self, n=1):
+        """Replay up to `n` answers undone by `go_back` without prompting the
+        user. Stops at the first answer whose question is no longer the next
+        question, e.g. because an earlier answer changed. Returns the number of
+        answers replayed.
+        """
+        return self.session.redo(n)
+
+    def prefill(self, answers, workers=8):
+        """Answers questions with answers from `answers`, a dict mapping keys to
+        answers, without prompting the user, so `run` only asks the rest.
+
+        An answer is accepted if a question for its key would be asked, i.e. its
+        condition is satisfied by answers that are already known, and it passes
+        validation. Answers are coerced like they are by `batch` (see
+        `Question.coerce`), and only validated by the question that would be
+        asked. Validators are called in a pool of `workers` threads, so
+        validators that wait on I/O run concurrently. Accepted answers are
+        transformed, and inserted in question order. Returns an `OrderedDict`
+        mapping the key of each rejected answer to the reason.
+        """
+        definition, session = self.compile(), self.session
+        rejected = OrderedDict((key, 'no question for key') for key in answers if key not in definition.positions)
+        pending = []
+        for i, key in enumerate(definition.keys):
+            if key in answers:
+                if key in session.answers:
+                    rejected[key] = 'already answered'
+                else:
+                    pending.append((i, key))
+
+        pool = None
+        try:
+            known = dict(session.answers)
+            while pending:
+                # resolve questions up to the first one with a condition that reads an answer resolved in this
+                # round, which must be accepted or rejected before it's known which question would be asked
+                jobs, blocked = [], set()
+                for n, (i, key) in enumerate(pending):
+                    if i in blocked:
+                        break
+                    try:
+                        question = self._resolve(definition.questions[i], known)
+                    except KeyError as e:
+                        rejected[key] = "condition reads '{}', which has no answer".format(e.args[0])
+                        continue
+                    if question is None:
+                        rejected[key] = 'not asked, no condition is satisfied'
+                        continue
+                    try:
+                        answer = question.coerce(answers[key], session.prompter_args(question))
+                    except ValueError as e:
+                        rejected[key] = 'invalid answer: {}'.format(e)
+                        continue
+                    jobs.append((key, question, answer))
+                    blocked.update(definition.dependents.get(key, ()))
+                else:
+                    n = len(pending)
+                pending = pending[n:]
+
+                if pool is None and workers and workers > 1 and len(jobs) > 1:
+                    from multiprocessing.pool import ThreadPool
+                    pool = ThreadPool(workers)
+                if pool is not None and len(jobs) > 1:
+                    errors = pool.map(lambda job: job[1].check(job[2]), jobs)
+                else:
+                    errors = [question.check(answer) for _, question, answer in jobs]
+
+                items = []
+                for (key, question, answer), error in zip(jobs, errors):
+                    if error:
+                        rejected[key] = 'invalid answer: {}'.format(error)
+                        continue
+                    session.remember(question, answer)
+                    known[key] = transformed = question.convert(answer)
+                    items.append((key, transformed, question))
+                session.update(items)
+        finally:
+            if pool is not None:
+                pool.terminate()
+        return rejected
+
+    @staticmethod
+    def _resolve(questions, answers):
+        """Returns first question in `questions` whose condition is satisfied by
+        `answers`, or `None`. Raises `KeyError` if a condition reads a key that
+        isn't answered.
+        """
+        for question in questions:
+            if not question._condition:
+                return question
+            for c in question._condition.conditions:
+                if not c.operator(answers[c.key], c.value):
+                    break
+            else:
+                return question
+        return None
 
     @property
     def done(self):
         return self.next_question is None
 
     def reset(self):
-        self.answers = OrderedDict()
+        self._session.reset()
 
     def format_answers(self, fmt='obj'):
         """Formats answers depending on `fmt`.
@@ -263,7 +885,4 @@ class Questionnaire:
     def answer_display(self, s=''):
         """Helper method for displaying the answers so far.
         """
-        padding = len(max(self.questions.keys(), key=len)) + 5
-        for key in list(self.answers.keys()):
-            s += '{:>{}} : {}\n'.format(key, padding, self.answers[key])
-        return s
+        return s + self.session.answer_display(self.max_answers_shown)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Asyncio runner for questionnaires, used by `Questionnaire.arun` and
+`Questionnaire.aask`. Requires Python 3.5+.
+
+Prompters, validators and transforms can be coroutine functions, or any
+functions that return awaitables, so prompters that wait on I/O, e.g. on a
+socket connected to a user, don't block other sessions running on the same event
+loop. Plain functions work too, but the core prompters block the event loop
+while they're waiting for the user.
+
+If the session goes back while an answer is being validated, e.g. because
+`go_back` is called by another task, validation is cancelled and the answer is
+discarded.
+"""
+import asyncio
+import inspect
+
+from .prompters import QuestionnaireGoBack
+from .timing import clock
+
+
+async def resolve(value):
+    """Awaits `value` if it's awaitable, else returns it.
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def timed(questionnaire, event, key, f, *args, **kwargs):
+    """Calls `f` and resolves its result. If the questionnaire has listeners,
+    emits `event` with the time taken, including time spent awaiting.
+    """
+    if not questionnaire.listeners:
+        return await resolve(f(*args, **kwargs))
+    start = clock()
+    try:
+        return await resolve(f(*args, **kwargs))
+    finally:
+        questionnaire.emit(event, key, clock() - start)
+
+
+async def cached(questionnaire, question, event, f, answer):
+    """Like `timed`, but if `question` is cached, looks up the result of `f` for
+    `answer` in its cache, and only calls `f` if it isn't there.
+    """
+    cache = question._cache
+    if cache is None:
+        return await timed(questionnaire, event, question.key, f, answer)
+    hit, result = cache.lookup(event, answer)
+    if not hit:
+        result = await timed(questionnaire, event, question.key, f, answer)
+        cache.store(event, answer, result)
+    return result
+
+
+async def aask(questionnaire):
+    """Asks the next question in `questionnaire` and returns the answer, unless
+    user goes back, or validation of the answer is cancelled. Invalid answers are
+    handled like they are by `Questionnaire.ask`.
+    """
+    error, retries, q = None, 0, None
+    start = clock() if questionnaire.listeners else None
+    try:
+        while True:
+            q = questionnaire.next_question
+            if q is None:
+                return
+            try:
+                with questionnaire.prompting(q):
+                    answer = await timed(questionnaire, 'prompt', q.key, q.prompter, questionnaire.get_prompt(q, error),
+                                         *questionnaire.prompter_args(q), **questionnaire.prompter_kwargs(q))
+            except QuestionnaireGoBack as e:
+                steps = e.args[0] if e.args else 1
+                if steps == 0:
+                    error = None  # user can redo current question even if `can_go_back` is `False`
+                    continue
+                questionnaire.go_back(steps)
+                return
+
+            session = questionnaire.session
+            validation = asyncio.ensure_future(
+                cached(questionnaire, q, 'validate', q._validate, answer) if q._validate else resolve(None))
+            session.pending = validation
+            try:
+                await asyncio.wait([validation])
+            finally:
+                if session.pending is validation:
+                    session.pending = None
+                validation.cancel()  # if task running `aask` was cancelled
+            if validation.cancelled():
+                return
+            error = validation.result()
+            if error:
+                retries += 1
+                questionnaire.invalid_answer(q, answer, error, retries)
+                continue
+            session.remember(q, answer)
+            if q._transform:
+                answer = await cached(questionnaire, q, 'transform', q._transform, answer)
+            session.accept(answer, q)
+            return answer
+    finally:
+        if start is not None and q is not None:
+            questionnaire.emit('ask', q.key, clock() - start)
+
+
+async def arun(questionnaire):
+    """Asks all remaining questions in `questionnaire`, returns the answers.
+    """
+    while not questionnaire.done:
+        await aask(questionnaire)
+    return questionnaire.answers
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""Finds every path a user can take through a questionnaire without running it,
+to check which questions can be asked and which conditions can fail:
+
+    report = analyze(q)
+    print(format_report(report))
+
+Answers to `one` questions are the values of their options, and answers to
+`many` questions are subsets of their options, as long as there are at most
+`2 ** max_many` of them. Answers that fail validation are dropped, and
+transforms are applied, so validators and transforms must not have side
+effects. Any other answer, e.g. to a `raw` question, or to a question with lazy
+options, is `UNKNOWN`. A condition on an `UNKNOWN` answer may or may not be
+satisfied, so both cases are explored.
+
+Paths aren't enumerated one by one. After each key, the state of a path is
+projected onto the answers that conditions of later questions read, and paths
+that reach the same projected state share everything that happens after it. So
+the cost of the analysis depends on the number of distinct states, not on the
+number of paths.
+
+From the command line, pass the questionnaire as `module:attribute`, or a JSON
+spec (see `spec`):
+
+    python -m questionnaire.analyze questions.json
+"""
+from __future__ import division, print_function
+import sys
+from collections import namedtuple
+from itertools import combinations
+
+from .prompters import prompters, as_options
+
+
+Report = namedtuple('Report', 'reachable, unreachable, errors, paths, error_paths, '
+                              'min_length, max_length, mean_length, states')
+
+
+class Unknown(object):
+    def __repr__(self):
+        return 'UNKNOWN'
+
+
+UNKNOWN = Unknown()  # answer whose value can't be known ahead of time
+_MISSING = object()  # key has no answer
+_END, _ERROR = 'end', 'error'
+
+
+class ConditionError(Exception):
+    """Signals a condition raises an exception for some answers."""
+
+
+def freeze(value):
+    """Hashable version of an answer, so it can be part of a state.
+    """
+    if isinstance(value, list):
+        return (list, tuple(freeze(v) for v in value))
+    if isinstance(value, tuple):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return (dict, frozenset((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+class Analyzer(object):
+    """Explores the states of a compiled `Definition`. A state is the position of
+    the next key to consider, and the answers to keys before that position that
+    are read by conditions of questions at or after it.
+    """
+    def __init__(self, definition, answers=None, max_many=10):
+        self.definition = definition
+        self.answers = dict(answers or {})  # answers before analysis starts
+        self.max_many = max_many
+        self.domains = {}  # question id -> answers it can have
+        self.reachable = set()
+        self.errors = {}
+        self.originals = {}  # frozen answer -> answer, for answers that aren't hashable
+
+        keys, n = definition.keys, len(definition.keys)
+        last_read = {}  # key -> last position of a question whose condition reads it
+        for i, questions in enumerate(definition.questions):
+            for question in questions:
+                for c in (question._condition.conditions if question._condition else ()):
+                    last_read[c.key] = i
+        # keys at each position that are answered before it and read by conditions at or after it. Other keys
+        # read by conditions can't have been answered yet, unless they were answered before analysis started
+        live, current = [()], []
+        for i in range(1, n + 1):
+            current = [key for key in current if last_read[key] >= i]
+            if last_read.get(keys[i - 1], -1) >= i:
+                current.append(keys[i - 1])
+            live.append(tuple(current))
+        self.live = live
+        # for each key in `live[i + 1]`, its index in `live[i]`, or `None` for `keys[i]`, the key answered at `i`
+        self.carry = []
+        for i in range(n):
+            index = {key: j for j, key in enumerate(live[i])}
+            self.carry.append(tuple(None if key == keys[i] else index[key] for key in live[i + 1]))
+
+    def start(self):
+        return (0, tuple(self.answers.get(key, _MISSING) for key in self.live[0]))
+
+    def run(self):
+        """Returns stats for paths from the first state: `(paths, error_paths,
+        min_length, max_length, total_length)`. Explores states iteratively, so
+        questionnaires of any length can be analyzed.
+        """
+        memo, expanded = {}, {}
+        root = self.start()
+        stack = [root]
+        while stack:
+            state = stack[-1]
+            if state in memo:
+                stack.pop()
+                continue
+            if state not in expanded:
+                expanded[state] = self.expand(state)
+            missing = [child for child, _, _ in expanded[state] if child not in memo and child not in (_END, _ERROR)]
+            if missing:
+                stack.extend(missing)
+                continue
+            memo[state] = self.combine(expanded.pop(state), memo)
+            stack.pop()
+        self.states = len(memo)
+        return memo[root]
+
+    def combine(self, outcomes, memo):
+        paths, error_paths, min_length, max_length, total = 0, 0, None, None, 0
+        for child, multiplicity, asked in outcomes:
+            if child is _END:
+                stats = (1, 0, 0, 0, 0)
+            elif child is _ERROR:
+                stats = (0, 1, None, None, 0)
+            else:
+                stats = memo[child]
+            paths += multiplicity * stats[0]
+            error_paths += multiplicity * stats[1]
+            total += multiplicity * (stats[4] + asked * stats[0])
+            if stats[0]:
+                min_length = stats[2] + asked if min_length is None else min(min_length, stats[2] + asked)
+                max_length = stats[3] + asked if max_length is None else max(max_length, stats[3] + asked)
+        return (paths, error_paths, min_length, max_length, total)
+
+    def expand(self, state):
+        """Returns outcomes of the key at the state's position, as a list of
+        `(next state, multiplicity, number of questions asked)`.
+        """
+        i, values = state
+        keys = self.definition.keys
+        if i == len(keys):
+            return [(_END, 1, 0)]
+        if keys[i] in self.answers:
+            return [(self.advance(state, self.answers[keys[i]]), 1, 0)]
+
+        answers = dict(self.answers)
+        answers.update((key, self.originals.get(value, value))
+                       for key, value in zip(self.live[i], values) if value is not _MISSING)
+        outcomes = []
+        for j, question in enumerate(self.definition.questions[i]):
+            try:
+                satisfied = self.check(question._condition, answers)
+            except ConditionError as e:
+                self.errors.setdefault((keys[i], j), str(e))
+                outcomes.append((_ERROR, 1, 0))
+                return outcomes
+            if satisfied is False:
+                continue
+            self.reachable.add((i, j))
+            children = {}
+            for answer in self.domain(question):
+                child = self.advance(state, answer)
+                children[child] = children.get(child, 0) + 1
+            outcomes.extend((child, multiplicity, 1) for child, multiplicity in children.items())
+            if satisfied:
+                return outcomes
+        outcomes.append((self.advance(state, _MISSING), 1, 0))  # key is skipped
+        return outcomes
+
+    def advance(self, state, answer):
+        i, values = state
+        frozen = freeze(answer)
+        if frozen is not answer:
+            self.originals[frozen] = answer
+        return (i + 1, tuple(frozen if j is None else values[j] for j in self.carry[i]))
+
+    def check(self, condition, answers):
+        """Returns `True` if condition is satisfied, `False` if it isn't, and
+        `None` if it depends on an `UNKNOWN` answer.
+        """
+        if not condition:
+            return True
+        unknown = False
+        for c in condition.conditions:
+            if c.key not in answers:
+                raise ConditionError("condition reads '{}', which has no answer".format(c.key))
+            answer = answers[c.key]
+            if answer is UNKNOWN:
+                unknown = True
+                continue
+            try:
+                if not c.operator(answer, c.value):
+                    return False
+            except Exception as e:
+                raise ConditionError("condition on '{}' raises {}: {}".format(c.key, type(e).__name__, e))
+        return None if unknown else True
+
+    def domain(self, question):
+        """Returns list of answers `question` can have.
+        """
+        try:
+            return self.domains[id(question)]
+        except KeyError:
+            pass
+        answers = self.values(question)
+        if answers is not None:
+            if question._validate:
+                answers = [a for a in answers if not question._validate(a)]
+            if question._transform:
+                answers = [question._transform(a) for a in answers]
+        domain = self.domains[id(question)] = [UNKNOWN] if answers is None else answers
+        return domain
+
+    def values(self, question):
+        """Returns answers the prompter can return, or `None` if they're unknown.
+        """
+        prompter = question.prompter
+        if prompter is not prompters.get('one') and prompter is not prompters.get('many'):
+            return None
+        options = as_options(question.prompter_args)
+        if not options.fetched:
+            return None
+        n = len(options)
+        if prompter is prompters.get('one'):
+            if question.prompter_kwargs.get('return_index', False):
+                return list(range(n))
+            return [options.value(i) for i in range(n)]
+        if n > self.max_many:
+            return None
+        return [[options.value(i) for i in chosen] for r in range(n + 1) for chosen in combinations(range(n), r)]
+
+
+def analyze(questionnaire, answers=None, max_many=10):
+    """Returns a `Report` of the paths through `questionnaire`, starting from
+    `answers`, e.g. `questionnaire.answers`, or from no answers.
+
+    `reachable` and `unreachable` are lists of `(key, i)` pairs, where `i` is the
+    index of a question in the list of questions for `key`. `errors` is a list
+    of `(key, i, message)` for conditions that raise an exception, e.g. because
+    they read a key with no answer. `paths` is the number of paths that reach
+    the end of the questionnaire, and `error_paths` is the number that stop at
+    an error. Lengths are numbers of questions asked on paths that reach the
+    end. `states` is the number of distinct states explored.
+    """
+    definition = questionnaire.compile()
+    analyzer = Analyzer(definition, answers, max_many)
+    paths, error_paths, min_length, max_length, total = analyzer.run()
+
+    keys = definition.keys
+    reachable, unreachable = [], []
+    for i, questions in enumerate(definition.questions):
+        for j in range(len(questions)):
+            (reachable if (i, j) in analyzer.reachable else unreachable).append((keys[i], j))
+    errors = [(key, j, message) for (key, j), message in sorted(analyzer.errors.items())]
+    return Report(reachable, unreachable, errors, paths, error_paths, min_length, max_length,
+                  total / paths if paths else None, analyzer.states)
+
+
+def format_count(n):
+    """Formats number of paths, which can have too many digits to print.
+    """
+    if n < 10 ** 15:
+        return str(n)
+    return '~10^{}'.format(int(n.bit_length() * 0.30103))  # log10(2)
+
+
+def format_report(report):
+    lines = [
+        'paths: {} ({} stop at an error)'.format(format_count(report.paths), format_count(report.error_paths)),
+        'questions asked: min {}, max {}, mean {}'.format(
+            report.min_length, report.max_length, None if report.mean_length is None else round(report.mean_length, 2)),
+        'states explored: {}'.format(report.states),
+    ]
+    for key, i in report.unreachable:
+        lines.append("unreachable: question {} for '{}'".format(i, key))
+    for key, i, message in report.errors:
+        lines.append("error: question {} for '{}': {}".format(i, key, message))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+    import importlib
+    parser = argparse.ArgumentParser(description='Analyze paths through a questionnaire.')
+    parser.add_argument('questionnaire', help='questionnaire, e.g. `package.module:q`, or JSON spec file')
+    parser.add_argument('--max-many', type=int, default=10, help='max options of `many` questions to enumerate')
+    args = parser.parse_args(argv)
+
+    if args.questionnaire.endswith('.json'):
+        from .spec import load
+        questionnaire = load(args.questionnaire)
+    else:
+        module, _, attribute = args.questionnaire.partition(':')
+        questionnaire = getattr(importlib.import_module(module), attribute or 'q')
+    report = analyze(questionnaire, max_many=args.max_many)
+    print(format_report(report))
+    return 1 if report.unreachable or report.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
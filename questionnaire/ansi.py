@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Terminal renderer for the core prompters that writes ANSI escape sequences
+instead of using curses. Select it with `Questionnaire(renderer='ansi')`.
+
+A `Terminal` keeps a model of what's on the screen for as long as it's open,
+which is for the whole run of a questionnaire. Prompters draw each frame into
+the model, and only the lines that differ from what's already on the screen are
+written to the terminal, in a single write. Answers shown above each prompt are
+only written once, and moving the indicator in a picker only rewrites two rows,
+which makes a big difference over slow connections.
+
+The terminal is drawn on stderr, and key presses are read from stdin, so output
+written to stdout isn't mixed up with the prompters' output, and stdout doesn't
+need to be redirected.
+"""
+from __future__ import unicode_literals
+import os
+import select
+import sys
+from contextlib import contextmanager
+
+from .picker import curses  # for key codes only, curses is never initialized
+
+try:
+    import termios
+    import tty
+except ImportError:  # not POSIX
+    termios = tty = None
+
+
+ESCAPE_TIMEOUT = 0.025  # seconds to wait for rest of escape sequence before escape is read as a key
+SEQUENCES = {
+    '[A': curses.KEY_UP, 'OA': curses.KEY_UP,
+    '[B': curses.KEY_DOWN, 'OB': curses.KEY_DOWN,
+    '[C': curses.KEY_RIGHT, 'OC': curses.KEY_RIGHT,
+    '[D': curses.KEY_LEFT, 'OD': curses.KEY_LEFT,
+    '[H': curses.KEY_HOME, 'OH': curses.KEY_HOME, '[1~': curses.KEY_HOME,
+    '[F': curses.KEY_END, 'OF': curses.KEY_END, '[4~': curses.KEY_END,
+    '[5~': curses.KEY_PPAGE, '[6~': curses.KEY_NPAGE,
+}
+KEYS_BACKSPACE = (127, 8)
+
+
+def as_text(s):
+    """Returns `s` decoded if it's UTF-8 bytes, e.g. a `str` on Python 2, so it
+    can be written to the terminal with text that isn't ASCII.
+    """
+    return s.decode('utf-8') if isinstance(s, bytes) else s
+
+
+class Terminal(object):
+    """Screen model and key reader that implements the methods of a curses
+    window used by `picker.Picker`, plus `readline` for the `raw` prompter.
+
+    Use it as a context manager to open it. It's re-entrant, and the terminal is
+    only restored when the outermost context exits, or while it's `suspended`.
+    Pass file descriptors to read keys from and write to, and `size`, to use it
+    with something other than a terminal.
+    """
+    def __init__(self, fd_in=None, fd_out=None, size=None):
+        self.fd_in = sys.stdin.fileno() if fd_in is None else fd_in
+        self.fd_out = sys.stderr.fileno() if fd_out is None else fd_out
+        self.size = size
+        self.depth = 0  # number of open contexts
+        self.attributes = None  # terminal attributes to restore
+        self.lines = []  # lines on the screen
+        self.frame = []  # lines being drawn
+        self.y = self.x = 0  # position set by `move`
+        self.cursor = None  # position of visible cursor, `None` if cursor is hidden
+        self.pending = b''  # bytes read but not consumed
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.open()
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0:
+            self.close()
+
+    @contextmanager
+    def suspended(self):
+        """Restores the terminal while the context is open, if it's open, e.g.
+        for a prompter that doesn't draw on it, and opens it again afterwards.
+        """
+        depth, self.depth = self.depth, 0
+        if depth:
+            self.close()
+        try:
+            yield self
+        finally:
+            if depth:
+                self.open()
+            self.depth = depth
+
+    def open(self):
+        if termios is not None and os.isatty(self.fd_in):
+            self.attributes = termios.tcgetattr(self.fd_in)
+            tty.setcbreak(self.fd_in)
+        self.write('\x1b[?1049h\x1b[2J\x1b[?25l')  # alternate screen, clear it, hide cursor
+        self.lines = []
+        self.cursor = None
+
+    def close(self):
+        self.write('\x1b[?25h\x1b[?1049l')  # show cursor, leave alternate screen
+        self.lines = []  # screen model no longer matches the screen
+        if self.attributes is not None:
+            termios.tcsetattr(self.fd_in, termios.TCSADRAIN, self.attributes)
+            self.attributes = None
+
+    def write(self, s):
+        data = s.encode('utf-8')
+        while data:
+            data = data[os.write(self.fd_out, data):]
+
+    # methods of a curses window
+
+    def getmaxyx(self):
+        if self.size is not None:
+            return self.size
+        try:
+            columns, lines = os.get_terminal_size(self.fd_out)
+        except (AttributeError, OSError, ValueError):
+            columns = lines = 0
+        return lines or 24, columns or 80
+
+    def clear(self):
+        """Starts a new frame. Nothing is written until `refresh`.
+        """
+        self.frame = [''] * self.getmaxyx()[0]
+
+    def move(self, y, x):
+        self.y, self.x = y, x
+
+    def clrtoeol(self):
+        if self.y < len(self.frame):
+            self.frame[self.y] = self.frame[self.y][:self.x]
+
+    def addnstr(self, y, x, line, n):
+        if y < len(self.frame):
+            self.frame[y] = self.frame[y][:x].ljust(x) + as_text(line)[:n]
+
+    def refresh(self, cursor=None):
+        """Writes the lines of the frame that aren't already on the screen, and
+        moves cursor to `(y, x)`, or hides it if `cursor` is `None`.
+        """
+        out = []
+        if len(self.lines) != len(self.frame):  # screen was resized, or hasn't been drawn yet
+            out.append('\x1b[2J')
+            self.lines = [''] * len(self.frame)
+        for y, line in enumerate(self.frame):
+            if line != self.lines[y]:
+                out.append('\x1b[{};1H{}\x1b[K'.format(y + 1, line))
+                self.lines[y] = line
+        if cursor != self.cursor:
+            if cursor is None:
+                out.append('\x1b[?25l')
+            else:
+                out.append('\x1b[{};{}H'.format(cursor[0] + 1, cursor[1] + 1))
+                if self.cursor is None:
+                    out.append('\x1b[?25h')
+            self.cursor = cursor
+        if out:
+            self.write(''.join(out))
+
+    def getch(self):
+        """Returns code of next key pressed. Escape sequences for special keys
+        are returned as curses key codes.
+        """
+        b = self.read_byte()
+        if b != 27 or not self.ready(ESCAPE_TIMEOUT):
+            return b
+        sequence = ''
+        while self.ready(ESCAPE_TIMEOUT) and len(sequence) < 8:
+            sequence += chr(self.read_byte())
+            if sequence in SEQUENCES:
+                return SEQUENCES[sequence]
+            if sequence[-1].isalpha() or sequence[-1] == '~':
+                break
+        return -1  # unknown sequence
+
+    def read_byte(self):
+        if not self.pending:
+            self.pending = os.read(self.fd_in, 1024)
+            if not self.pending:
+                raise EOFError
+        b, self.pending = self.pending[:1], self.pending[1:]
+        return ord(b)
+
+    def ready(self, timeout):
+        return bool(self.pending) or bool(select.select([self.fd_in], [], [], timeout)[0])
+
+    # input for `raw` prompter
+
+    def readline(self, prompt, secret=False):
+        """Shows `prompt`, and returns the line typed by the user. If `secret`
+        is true, the line isn't shown.
+        """
+        chars = []
+        while True:
+            self.draw_prompt(prompt, '' if secret else ''.join(chars))
+            c = self.getch()
+            if c in (10, 13):
+                return ''.join(chars)
+            if c in KEYS_BACKSPACE:
+                if chars:
+                    chars.pop()
+            elif c == 3:  # ctrl + c, if terminal doesn't send signals
+                raise KeyboardInterrupt
+            elif c == 4 and not chars:  # ctrl + d
+                raise EOFError
+            elif c >= 0x80 and c < 0x100:  # first byte of UTF-8 character
+                data = bytearray([c])
+                while len(data) < 4:
+                    try:
+                        chars.append(bytes(data).decode('utf-8'))
+                        break
+                    except UnicodeDecodeError:
+                        data.append(self.read_byte())
+            elif 32 <= c < 127:
+                chars.append(chr(c))
+
+    def draw_prompt(self, prompt, text):
+        height, width = self.getmaxyx()
+        lines = as_text(prompt).split('\n')
+        lines[-1] += text
+        lines = lines[-height:]
+        self.clear()
+        for y, line in enumerate(lines):
+            self.addnstr(y, 0, line[-(width - 1):] if y == len(lines) - 1 else line, width - 1)
+        last = lines[-1]
+        self.refresh(cursor=(len(lines) - 1, min(len(last), width - 1)))
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Runs a questionnaire without prompting, against records of answers instead
+of user input. Conditions, validation and transforms work just like they do
+when the questionnaire is run by a user.
+
+From the command line, pass the questionnaire as `module:attribute`, and a JSON
+or NDJSON file of records (or `-` for NDJSON from stdin):
+
+    python -m questionnaire.batch config.questions:q answers.ndjson --processes 4
+
+Formatted answers for each record are written to stdout, one record per line,
+and errors are written to stderr.
+"""
+from __future__ import print_function
+import argparse
+import importlib
+import json
+import sys
+from collections import namedtuple
+
+from .prompters import NO_ANSWER
+
+
+Result = namedtuple('Result', 'index, answers, error')
+
+
+class BatchError(Exception):
+    """Signals a record can't answer the questionnaire."""
+
+
+def replay(questionnaire, record):
+    """Resets `questionnaire` and answers its questions with answers from
+    `record`, a dict mapping question keys to answers. Returns the answers.
+    Answers are coerced as core prompters would coerce them, see
+    `prompters.headless`. Raises `BatchError` if `record` has no answer for a
+    question that would be asked, and it has no default, or if an answer is
+    invalid.
+    """
+    questionnaire.reset()
+    prefetch, questionnaire.prefetch = questionnaire.prefetch, 0  # options are never shown
+    try:
+        while True:
+            q = questionnaire.next_question
+            if q is None:
+                return questionnaire.answers
+            try:  # as if the answer had been entered, e.g. `raw` applies its `type` and `default`
+                args = questionnaire.prompter_args(q)
+                answer = q.coerce(record[q.key], args) if q.key in record else q.coerce(args=args)
+            except ValueError as e:
+                raise BatchError("invalid answer for '{}': {}".format(q.key, e))
+            if answer is NO_ANSWER:
+                raise BatchError("no answer for '{}'".format(q.key))
+            error = questionnaire.submit(answer, q)
+            if error:
+                raise BatchError("invalid answer for '{}': {}".format(q.key, error))
+    finally:
+        questionnaire.prefetch = prefetch
+
+
+def run_batch(questionnaire, records, fmt='obj', processes=None, chunksize=64):
+    """Replays each record in `records` against `questionnaire`, and yields a
+    `Result` for each record, in order. `answers` are formatted with
+    `format_answers`. If a record can't be replayed, `answers` is `None` and
+    `error` explains why, and the batch continues.
+
+    Pass `processes` to replay records in a pool of worker processes. Workers
+    are forked, so the questionnaire doesn't need to be picklable, but records
+    do.
+    """
+    if not processes or processes == 1:
+        for item in enumerate(records):
+            yield _replay(questionnaire, item, fmt)
+        return
+
+    import multiprocessing
+    try:
+        context = multiprocessing.get_context('fork')
+    except (AttributeError, ValueError):  # Python 2, or no fork on this platform
+        context = multiprocessing
+    pool = context.Pool(processes, initializer=_init_worker, initargs=(questionnaire, fmt))
+    try:
+        for result in pool.imap(_replay_in_worker, enumerate(records), chunksize):
+            yield result
+    finally:
+        pool.terminate()
+
+
+def _replay(questionnaire, item, fmt):
+    index, record = item
+    try:
+        replay(questionnaire, record)
+    except Exception as e:
+        error = str(e) if isinstance(e, BatchError) else '{}: {}'.format(type(e).__name__, e)
+        return Result(index, None, error)
+    return Result(index, questionnaire.format_answers(fmt), None)
+
+
+_worker = {}  # questionnaire and format in worker process
+
+
+def _init_worker(questionnaire, fmt):
+    _worker.update(questionnaire=questionnaire, fmt=fmt)
+
+
+def _replay_in_worker(item):
+    return _replay(_worker['questionnaire'], item, _worker['fmt'])
+
+
+def load_records(f, ndjson=None):
+    """Yields records from file object `f`. If `ndjson` is `None`, `f` is read
+    as NDJSON (one record per line) if its name ends in `.ndjson` or `.jsonl`.
+    Otherwise it's read as a JSON array of records, or a single record.
+    """
+    if ndjson is None:
+        ndjson = getattr(f, 'name', '').endswith(('.ndjson', '.jsonl'))
+    if ndjson:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+        return
+    records = json.load(f)
+    for record in ([records] if isinstance(records, dict) else records):
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a questionnaire against records of answers.')
+    parser.add_argument('questionnaire', help='questionnaire to run, e.g. `package.module:q`')
+    parser.add_argument('records', help='JSON or NDJSON file of records, or `-` for NDJSON from stdin')
+    parser.add_argument('--fmt', default='obj', choices=('obj', 'array', 'plain'))
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    module, _, attribute = args.questionnaire.partition(':')
+    questionnaire = getattr(importlib.import_module(module), attribute or 'q')
+
+    errors = 0
+    f = sys.stdin if args.records == '-' else open(args.records)
+    with f:
+        records = load_records(f, ndjson=True if args.records == '-' else None)
+        for result in run_batch(questionnaire, records, fmt=args.fmt, processes=args.processes):
+            if result.error:
+                errors += 1
+                print('record {}: {}'.format(result.index, result.error), file=sys.stderr)
+            else:
+                print(result.answers.replace('\n', '; ') if args.fmt == 'plain' else result.answers)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Opt-in cache for questions that are asked again and again, e.g. because
+users go back and forth, or that have expensive validators and transforms:
+
+    q.one('region', regions).cache(size=100).validate(check_quota)
+
+A cached question's options are wrapped in a single `Options` instance, so
+they're only indexed for filtering once, however many times the question is
+asked. The results of its validator and transform are kept in an LRU cache
+keyed by answer, so they're only called once for each distinct answer.
+Validators and transforms must return the same result for the same answer for
+this to make sense. Call `Question.invalidate` if they don't, e.g. after the
+data they read changes.
+
+When a cached question is asked again in a session, e.g. after going back, the
+last answer given to it in the session is pre-filled: it's the default of a
+`raw` question, the option the indicator starts on for `one`, and the options
+already chosen for `many`. Sessions keep the answers to pre-fill (see
+`Session.remember`), because questions are shared by all sessions.
+"""
+from collections import OrderedDict
+
+from .analyze import freeze
+from .prompters import prompters, Options, as_options
+
+
+_MISSING = object()
+
+
+class QuestionCache(object):
+    """Cache attached to a question by `Question.cache`. Holds up to `size`
+    validation and transform results.
+    """
+    def __init__(self, size=128, prefill=True):
+        self.size = size
+        self.prefill = prefill
+        self.results = OrderedDict()  # (name, frozen answer) -> result, least recently used first
+        self.hits = self.misses = 0
+
+    def lookup(self, name, answer):
+        """Returns `(True, result)` if result of calling `name` on `answer` is
+        cached, or `(False, None)` if it isn't.
+        """
+        key = self.key(name, answer)
+        if key is None or key not in self.results:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        result = self.results.pop(key)
+        self.results[key] = result  # most recently used
+        return True, result
+
+    def store(self, name, answer, result):
+        key = self.key(name, answer)
+        if key is None or not self.size:
+            return
+        self.results.pop(key, None)
+        self.results[key] = result
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def call(self, name, f, answer):
+        """Returns result of `f(answer)`, calling `f` only if it isn't cached.
+        """
+        hit, result = self.lookup(name, answer)
+        if not hit:
+            result = f(answer)
+            self.store(name, answer, result)
+        return result
+
+    def key(self, name, answer):
+        """Returns cache key for `answer`, or `None` if it isn't hashable.
+        """
+        key = (name, freeze(answer))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def clear(self, answer=_MISSING):
+        """Drops cached results for `answer`, or all results if no answer is
+        passed.
+        """
+        if answer is _MISSING:
+            self.results.clear()
+            return
+        for name in ('validate', 'transform'):
+            key = self.key(name, answer)
+            if key is not None:
+                self.results.pop(key, None)
+
+    def prepare(self, question):
+        """Wraps question's options in a single `Options` instance, which is
+        reused each time the question is asked.
+        """
+        if question.prompter is prompters.get('one') or question.prompter is prompters.get('many'):
+            question.prompter_args = (as_options(question.prompter_args),)
+
+    def refresh(self, question):
+        """Drops options of `question` that were fetched from an options
+        function, and the index used to filter them, in every session.
+        """
+        for arg in question.prompter_args:
+            if isinstance(arg, Options):
+                arg.refresh()
+
+    def prefilled(self, question, args, kwargs, answer):
+        """Returns prompter kwargs with `answer`, the last answer to `question`,
+        pre-filled, or `kwargs` if there's nothing to pre-fill. `args` are the
+        args the prompter is called with.
+        """
+        if not self.prefill:
+            return kwargs
+        prompter = question.prompter
+        if prompter is prompters.get('raw'):
+            return dict(kwargs, default=answer)
+        if prompter is prompters.get('one'):
+            if kwargs.get('return_index', False):
+                return dict(kwargs, idx=answer)
+            index = self.index(args, [answer])
+            return kwargs if not index else dict(kwargs, idx=index[0])
+        if prompter is prompters.get('many'):
+            index = self.index(args, answer)
+            return dict(kwargs, default=index, idx=index[0] if index else kwargs.get('idx', 0))
+        return kwargs
+
+    def prompt(self, question, answer):
+        """Returns prompt of `question`, showing `answer` as the pre-filled
+        default of a `raw` question.
+        """
+        if self.prefill and question.prompter is prompters.get('raw'):
+            return question.format_prompt(answer)
+        return question.prompt
+
+    def index(self, args, values):
+        """Returns indices of options in prompter `args` whose values are in
+        `values`.
+        """
+        options, indices, remaining = as_options(args), [], list(values)
+        i = 0
+        while remaining and options.has(i):
+            value = options.value(i)
+            if value in remaining:
+                remaining.remove(value)
+                indices.append(i)
+            i += 1
+        return indices
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Saves a session's answers and undo history to a file after each answer, so
+an interrupted questionnaire can be resumed where it left off:
+
+    q.resume('answers.ndjson')  # restores answers, if file exists
+    q.run()
+
+The file is an append-only log of the records written by `stream.AnswerStream`.
+Each record is appended with a single write, and synced to disk before the next
+question is asked. If a write is interrupted, the incomplete last line is
+ignored when the log is read.
+
+Every `compact_every` records, the log is compacted: it's replaced by the
+shortest log that rebuilds the same answers and undo history, so its length is
+bounded by the number of answers and the size of the history. The compacted log
+is written to a temporary file that atomically replaces the log, so there's
+always a complete log on disk.
+
+Answers that can be redone after going back aren't saved.
+"""
+import json
+import os
+import tempfile
+
+from .session import _MISSING
+from .stream import AnswerStream
+
+
+replace = getattr(os, 'replace', os.rename)  # `os.replace` is atomic on all platforms, but requires Python 3.3
+
+
+class Checkpoint(AnswerStream):
+    """Writes changes to the answers of `session` to the log at `path`, after
+    compacting it.
+    """
+    def __init__(self, session, path, compact_every=500):
+        self.session = session
+        self.path = path
+        self.compact_every = compact_every
+        self.f = None
+        self.size = 0  # number of records in last snapshot
+        self.compact()
+
+    def write(self, op, *fields):
+        AnswerStream.write(self, op, *fields)
+        os.fsync(self.f.fileno())
+        if self.seq >= self.size + self.compact_every:
+            self.compact()
+
+    def writes_to_stdout(self):
+        return False  # stdout needn't be restored to write to the log
+
+    def answer_many(self, items):
+        """Appends a record for each answer, and syncs them to disk once.
+        """
+        for key, value in items:
+            AnswerStream.write(self, 'answer', ('key', key), ('value', value))
+        if items:
+            os.fsync(self.f.fileno())
+            if self.seq >= self.size + self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Replaces the log with a snapshot of the session.
+        """
+        if self.f is not None:
+            self.f.close()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                self.f, self.seq = f, 0
+                for record in snapshot(self.session):
+                    AnswerStream.write(self, *record)
+                os.fsync(f.fileno())
+            replace(temp, self.path)
+        except Exception:
+            os.remove(temp)
+            raise
+        self.size = self.seq
+        self.f = open(self.path, 'a')
+
+    def close(self):
+        self.f.close()
+
+
+def snapshot(session):
+    """Returns the shortest list of records that rebuilds the answers and undo
+    history of `session`. These are a `reset` record with the answers before the
+    first answer in the history, followed by an `answer` record for each answer
+    in the history, or a `delete` record for each answer deleted directly.
+    """
+    answers, journal = session.answers, list(session.journal)
+    values = []  # value set by each entry in journal
+    later = {}  # key -> value set by next entry in journal for key
+    for key, previous, _ in reversed(journal):
+        values.append(later.get(key, answers.get(key, _MISSING)))  # missing if answer was deleted
+        later[key] = previous
+    values.reverse()
+
+    base = [(key, later.get(key, value)) for key, value in answers.items()]  # in `answers` order
+    base.extend((key, value) for key, value in later.items() if key not in answers)
+    base = [(key, value) for key, value in base if value is not _MISSING]
+    records = [('reset', ('answers', [[key, value] for key, value in base]))]
+    for (key, _, _), value in zip(journal, values):
+        if value is _MISSING:
+            records.append(('delete', ('key', key)))
+        else:
+            records.append(('answer', ('key', key), ('value', value)))
+    return records
+
+
+def replay(session, lines):
+    """Rebuilds answers and undo history of `session` from the records in a log.
+    Ignores an incomplete last line.
+    """
+    lines = [line for line in lines if line.strip()]
+    outputs, session.outputs = session.outputs, []  # don't write records that are being read
+    try:
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if i == len(lines) - 1:
+                    break
+                raise
+            op = record['op']
+            if op == 'answer':
+                session.undone.clear()
+                session.set_answer(record['key'], record['value'])
+            elif op == 'retract':
+                session.pop_answer()  # also restores earlier answer, so `restore` records are skipped
+            elif op == 'delete':
+                session.answers.pop(record['key'], None)  # recorded in history, like any direct change
+            elif op == 'reset':
+                session.reset(type(session.answers)((key, value) for key, value in record['answers']))
+        session.undone.clear()
+    finally:
+        session.outputs = outputs
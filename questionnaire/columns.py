@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Evaluates the conditions of a questionnaire's questions against many records
+of answers at once, e.g. to find out which questions each respondent in a survey
+would have seen. Records are passed as a table of columns, a dict mapping each
+question key to a list or NumPy array with an answer for each record:
+
+    table = {'age': [17, 30, 65], 'plans': ['school', 'work', None]}
+    masks = question_masks(q, table)
+    masks[('plans', 1)]  # [False, True, False]
+
+`None` in a column means the record has no answer to that key, and conditions
+that read it aren't satisfied. With NumPy, conditions with built-in operators
+that read array columns are evaluated as array operations. Other conditions,
+i.e. those that read lists, compare answers to lists, or use custom operators,
+are evaluated one record at a time.
+"""
+from collections import OrderedDict
+
+from . import Condition
+
+
+BUILTIN_OPERATORS = tuple(Condition.OPERATORS.values())
+
+
+def condition_masks(questionnaire, table):
+    """Returns an `OrderedDict` mapping `(key, i)` for the `i`th question for
+    each key to a mask of the records for which the question's condition is
+    satisfied. Masks are NumPy arrays if any column is an array, and lists of
+    booleans otherwise. Raises `KeyError` if a condition reads a key that isn't
+    in `table`.
+    """
+    numpy = _numpy(table)
+    n = len(next(iter(table.values()))) if table else 0
+    masks = OrderedDict()
+    for key, questions in questionnaire.questions.items():
+        for i, question in enumerate(questions):
+            mask = numpy.ones(n, dtype=bool) if numpy else [True] * n
+            for c in (question._condition.conditions if question._condition else ()):
+                m = compare(table[c.key], c.value, c.operator, numpy)
+                mask = mask & m if numpy else [a and b for a, b in zip(mask, m)]
+            masks[(key, i)] = mask
+    return masks
+
+
+def question_masks(questionnaire, table):
+    """Like `condition_masks`, but each mask is of the records that would have
+    seen the question, i.e. those for which its condition is satisfied, and the
+    conditions of earlier questions for the same key aren't.
+    """
+    masks = condition_masks(questionnaire, table)
+    numpy = _numpy(table)
+    for key, questions in questionnaire.questions.items():
+        seen = None  # records that saw an earlier question for key
+        for i in range(len(questions)):
+            mask = masks[(key, i)]
+            if seen is None:
+                seen = mask
+            elif numpy:
+                masks[(key, i)], seen = mask & ~seen, seen | mask
+            else:
+                masks[(key, i)] = [m and not s for m, s in zip(mask, seen)]
+                seen = [m or s for m, s in zip(mask, seen)]
+    return masks
+
+
+def compare(column, value, operator, numpy=None):
+    """Returns mask of records whose answer in `column` satisfies `operator`.
+    """
+    if numpy and isinstance(column, numpy.ndarray) and column.ndim == 1 and operator in BUILTIN_OPERATORS \
+            and not isinstance(value, (list, tuple, dict, set)):
+        if column.dtype != object:
+            mask = numpy.asarray(operator(column, value), dtype=bool)
+        else:  # only object arrays can have `None` answers, which can't be compared with operators like `<`
+            present = numpy.array([a is not None for a in column], dtype=bool)
+            mask = numpy.zeros(len(column), dtype=bool)
+            mask[present] = operator(column[present], value)
+        if mask.shape == column.shape:
+            return mask
+    mask = [a is not None and bool(operator(a, value)) for a in column]
+    return numpy.array(mask, dtype=bool) if numpy else mask
+
+
+def _numpy(table):
+    """Returns NumPy module if a column in `table` is an array. NumPy is only
+    imported if it has already been imported by the caller.
+    """
+    import sys
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and any(isinstance(column, numpy.ndarray) for column in table.values()):
+        return numpy
+    return None
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""Curses option picker used by the core prompters. Unlike `pick.Picker`, a
+picker keeps one curses screen open until the user is done, and redraws only
+the rows that change when the user moves or toggles an option.
+
+Only the rows in the viewport are ever formatted, and options are read through
+an `Options` view (see `prompters`), so the cost of drawing the picker depends
+on the height of the terminal, not on the number of options.
+"""
+import sys
+import curses
+
+
+KEYS_ENTER = (curses.KEY_ENTER, ord('\n'), ord('\r'))
+KEYS_UP = (curses.KEY_UP, ord('k'))
+KEYS_DOWN = (curses.KEY_DOWN, ord('j'))
+KEYS_PAGE_UP = (curses.KEY_PPAGE, 2)  # ctrl + b
+KEYS_PAGE_DOWN = (curses.KEY_NPAGE, 6)  # ctrl + f
+KEYS_FIRST = (curses.KEY_HOME, ord('g'))
+KEYS_LAST = (curses.KEY_END, ord('G'))
+KEYS_TOGGLE = (ord(' '),)
+KEYS_BACK = (curses.KEY_LEFT, ord('h'))
+KEYS_COUNT = tuple(ord(str(d)) for d in range(10))
+KEYS_MOVE = KEYS_UP + KEYS_DOWN + KEYS_PAGE_UP + KEYS_PAGE_DOWN + KEYS_FIRST + KEYS_LAST
+KEYS_FILTER = (ord('/'),)
+KEYS_BACKSPACE = (curses.KEY_BACKSPACE, 127, 8)
+KEYS_ESCAPE = (27,)
+
+INDICATOR = '‣' if sys.version_info >= (3, 0) else '>'
+CHECKED, UNCHECKED = ('✔', ' ') if sys.version_info >= (3, 3) else ('@', ' ')
+
+
+class FilterIndex(object):
+    """Case-insensitive substring search over option labels. Matches for each
+    query are kept on a stack, so typing a character only rescans the matches
+    for the previous query, and deleting one is free. A trigram index over the
+    labels narrows the first scan if a query of 3 or more characters is entered
+    at once, e.g. if it's pasted.
+
+    Building the index consumes lazy options.
+    """
+    def __init__(self, options):
+        self.labels = [str(options.label(i)).lower() for i in range(len(options))]
+        self.stack = [('', None)]  # (query, indices of matching options), `None` matches all
+        self.trigrams = None  # trigram -> set of indices of labels containing it
+
+    def search(self, query):
+        """Returns indices of options whose labels contain `query`, or `None` if
+        the query is empty.
+        """
+        query = query.lower()
+        while not query.startswith(self.stack[-1][0]):
+            self.stack.pop()
+        previous, matches = self.stack[-1]
+        if query == previous:
+            return matches
+        if matches is None:
+            matches = self.candidates(query)
+        matches = [i for i in matches if query in self.labels[i]]
+        self.stack.append((query, matches))
+        return matches
+
+    def candidates(self, query):
+        if len(query) < 3:
+            return range(len(self.labels))
+        if self.trigrams is None:
+            self.trigrams = {}
+            for i, label in enumerate(self.labels):
+                for j in range(len(label) - 2):
+                    self.trigrams.setdefault(label[j:j+3], set()).add(i)
+        candidates = None
+        for j in range(len(query) - 2):
+            indices = self.trigrams.get(query[j:j+3], set())
+            candidates = indices if candidates is None else candidates & indices
+        return sorted(candidates)
+
+
+class Picker(object):
+    """Lets the user pick one of `options`, or many of them if `chosen` is a set
+    of chosen indices. In the latter case a `done` row is appended to the
+    options, and `chosen` is updated in place.
+
+    `options` must have `has(i)` and `label(i)` methods, and support `len` once
+    `has` has returned `False`. `start` returns the index of the picked option
+    (or `len(options)` for the `done` row), or `None` if the user goes back.
+
+    Typing a number before <kbd>g</kbd> or <kbd>G</kbd> jumps to the option at
+    that (1-based) index. Typing <kbd>/</kbd> starts filtering the options by
+    the text typed after it, and <kbd>esc</kbd> stops filtering.
+    """
+    def __init__(self, options, title=None, indicator=INDICATOR, index=0, chosen=None, done='done...'):
+        self.options = options
+        self.title = title
+        self.indicator = indicator
+        self.chosen = chosen
+        self.done = done
+        self.top = 0  # index of first row in viewport
+        self.height = 1  # number of rows in viewport, set by `layout`
+        self.count = ''  # digits typed before a jump
+        self.query = None  # filter query, `None` if user isn't filtering
+        self.filter_index = None
+        self.rows = None  # indices of options matching filter, `None` if all options are shown
+        self.index = index if self.has_row(index) else 0
+
+    @property
+    def multi(self):
+        return self.chosen is not None
+
+    def has_option(self, i):
+        if self.rows is None:
+            return self.options.has(i)
+        return i < len(self.rows)
+
+    def has_row(self, i):
+        if i < 0:
+            return False
+        if self.has_option(i):
+            return True
+        return self.multi and i == (len(self.options) if self.rows is None else len(self.rows))
+
+    def last_row(self):
+        """Index of the last row. Consumes lazy options.
+        """
+        self.has_option(sys.maxsize)
+        n = len(self.options) if self.rows is None else len(self.rows)
+        return n - (0 if self.multi else 1)
+
+    def option(self, i):
+        """Index of the option shown in row `i`.
+        """
+        if not self.has_option(i):
+            return len(self.options)
+        return i if self.rows is None else self.rows[i]
+
+    def row(self, i):
+        """Text for the row at index `i`.
+        """
+        prefix = self.indicator if i == self.index else ' ' * len(self.indicator)
+        if not self.multi:
+            return '{} {}'.format(prefix, self.options.label(self.option(i)))
+        if not self.has_option(i):
+            return '{}   {}'.format(prefix, self.done)
+        option = self.option(i)
+        return '{} {} {}'.format(prefix, CHECKED if option in self.chosen else UNCHECKED, self.options.label(option))
+
+    def target(self, c):
+        """Returns the index the indicator should move to after key `c` is
+        pressed. Single steps wrap around at either end, pages and jumps don't.
+        """
+        count, self.count = self.count, ''
+        if c in KEYS_DOWN:
+            return self.index + 1 if self.has_row(self.index + 1) else 0
+        if c in KEYS_UP:
+            return self.index - 1 if self.index > 0 else max(self.last_row(), 0)
+        if c in KEYS_PAGE_DOWN:
+            return self.index + self.height if self.has_row(self.index + self.height) else max(self.last_row(), 0)
+        if c in KEYS_PAGE_UP:
+            return max(self.index - self.height, 0)
+        if count:
+            index = int(count) - 1
+            return index if self.has_row(index) else max(self.last_row(), 0)
+        return 0 if c in KEYS_FIRST else max(self.last_row(), 0)
+
+    def move(self, index):
+        """Moves the indicator to `index`. Returns `True` if the viewport had to
+        scroll.
+        """
+        self.index = index
+        top = self.top
+        if self.index < self.top:
+            self.top = self.index
+        elif self.index >= self.top + self.height:
+            self.top = self.index - self.height + 1
+        return top != self.top
+
+    def toggle(self):
+        option = self.option(self.index)
+        if option in self.chosen:
+            self.chosen.remove(option)
+        else:
+            self.chosen.add(option)
+
+    def filter(self, query):
+        """Shows only options matching `query`, or all options if `query` is
+        `None`. The indicator stays on the same option if it still matches.
+        """
+        option = self.option(self.index)
+        self.query = query
+        if query is None:
+            self.rows = None
+        else:
+            if self.filter_index is None:
+                if getattr(self.options, 'filter_index', None) is None:
+                    self.options.filter_index = FilterIndex(self.options)  # reused if options are shown again
+                self.filter_index = self.options.filter_index
+            self.rows = self.filter_index.search(query)
+        if self.rows is None:
+            index = option
+        elif option in self.rows:
+            index = self.rows.index(option)
+        else:
+            index = 0
+        self.top = 0
+        self.move(index)
+
+    def start(self, screen=None):
+        """Runs the picker in a new curses screen, or in `screen`, an object with
+        the methods of a curses window that the picker uses, e.g. an
+        `ansi.Terminal`.
+        """
+        if screen is not None:
+            return self._run(screen)
+        return curses.wrapper(self._start)
+
+    def _start(self, screen):
+        curses.use_default_colors()
+        if hasattr(curses, 'set_escdelay'):
+            curses.set_escdelay(25)
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+        return self._run(screen)
+
+    def _run(self, screen):
+        self.screen = screen
+        self.layout()
+        self.draw()
+        return self.run_loop()
+
+    def run_loop(self):
+        while True:
+            c = self.screen.getch()
+            if self.query is not None and self.handle_filter(c):
+                continue
+            if c in KEYS_COUNT:
+                self.count += chr(c)
+                continue
+            if c in KEYS_MOVE:
+                previous = self.index
+                if self.move(self.target(c)):
+                    self.draw_rows()
+                else:
+                    self.draw_row(previous)
+                    self.draw_row(self.index)
+                    self.screen.refresh()
+            elif c in KEYS_ENTER or c in KEYS_TOGGLE and self.multi:
+                if not self.multi or not self.has_option(self.index):
+                    if c in KEYS_ENTER and self.has_row(self.index):
+                        return self.option(self.index)
+                    continue
+                self.toggle()
+                self.draw_row(self.index)
+                self.screen.refresh()
+            elif c in KEYS_BACK:
+                return None
+            elif c in KEYS_FILTER:
+                self.filter('')
+                self.draw()
+            elif c == curses.KEY_RESIZE:
+                self.layout()
+                self.draw()
+            self.count = ''
+
+    def handle_filter(self, c):
+        """Updates filter query if `c` is a printable character, backspace or
+        escape, and returns `True`. Otherwise returns `False`, and `c` is handled
+        as it is when the user isn't filtering. Deleting the last character of
+        the query, or pressing escape, stops filtering.
+        """
+        if c in KEYS_ESCAPE or c in KEYS_BACKSPACE and not self.query:
+            self.filter(None)
+        elif c in KEYS_BACKSPACE:
+            self.filter(self.query[:-1])
+        elif 32 <= c < 127:
+            self.filter(self.query + chr(c))
+        else:
+            return False
+        self.draw()
+        return True
+
+    def layout(self):
+        """Computes which title lines fit on the screen, and how many rows are
+        left for options. At least half of the screen is kept for options.
+        """
+        max_y, self.width = self.screen.getmaxyx()
+        lines = self.title.split('\n') + [''] if self.title else ['']
+        available = max(max_y - 1, 1)
+        reserved = max(available // 2, 1)
+        if not self.has_row(reserved - 1):
+            reserved = self.last_row() + 1
+        room = max(available - reserved, 1)
+        self.title_lines = lines[len(lines) - room:] if room < len(lines) else lines
+        self.height = max(available - len(self.title_lines), 1)
+        self.top = max(min(self.top, self.index), self.index - self.height + 1)
+
+    def draw(self):
+        """Draws title, and filter query in place of the blank line below it.
+        """
+        self.screen.clear()
+        for y, line in enumerate(self.title_lines[:-1]):
+            self.addline(1 + y, line)
+        self.addline(len(self.title_lines), '' if self.query is None else '/' + self.query)
+        self.draw_rows()
+
+    def draw_rows(self):
+        for i in range(self.top, self.top + self.height):
+            self.draw_row(i)
+        self.screen.refresh()
+
+    def draw_row(self, i):
+        if self.top <= i < self.top + self.height:
+            self.addline(1 + len(self.title_lines) + i - self.top, self.row(i) if self.has_row(i) else '')
+
+    def addline(self, y, line):
+        try:
+            self.screen.move(y, 0)
+            self.screen.clrtoeol()
+            self.screen.addnstr(y, 1, line, self.width - 2)
+        except curses.error:  # writing to bottom right corner of screen
+            pass
@@ -5,15 +5,17 @@ prompter should raise `QuestionnaireGoBack`.
 
 Extending questionnaire is as simple writing your own prompter and passing it to
 `add`.
+
+Core prompters import curses and getpass only when they're called, so importing
+questionnaire stays fast when they aren't used. If they're passed an
+`ansi.Terminal` as `renderer`, they draw on it instead of using curses and
+`input`.
 """
 from __future__ import print_function
 import sys
-import curses
 import os
-import getpass
 from contextlib import contextmanager
-
-from pick import Picker
+from itertools import islice
 
 
 prompters = {}
@@ -44,84 +46,198 @@ def register(key='function'):
 
 @register(key='one')
 def one(prompt, *args, **kwargs):
-    """Instantiates a picker, registers custom handlers for going back,
-    and starts the picker.
+    """Instantiates a picker and starts it. Returns the chosen option.
     """
-    indicator = '‣'
-    if sys.version_info < (3, 0):
-        indicator = '>'
-
-    def go_back(picker):
-        return None, -1
-
-    options, verbose_options = prepare_options(args)
-    idx = kwargs.get('idx', 0)
-
-    picker = Picker(verbose_options, title=prompt, indicator=indicator, default_index=idx)
-    picker.register_custom_handler(ord('h'), go_back)
-    picker.register_custom_handler(curses.KEY_LEFT, go_back)
-    with stdout_redirected(sys.stderr):
-        option, index = picker.start()
-        if index == -1:
-            raise QuestionnaireGoBack
-        if kwargs.get('return_index', False):
-            # `one` was called by a special client, e.g. `many`
-            return index
-        return options[index]
+    from .picker import Picker
+    options = as_options(args)
+    picker = Picker(options, title=prompt, index=kwargs.get('idx', 0))
+    index = start(picker, kwargs.get('renderer'))
+    if index is None:
+        raise QuestionnaireGoBack
+    if kwargs.get('return_index', False):
+        return index
+    return options.value(index)
 
 
 @register(key='many')
 def many(prompt, *args, **kwargs):
-    """Calls `pick` in a while loop to allow user to pick many
-    options. Returns a list of chosen options.
+    """Instantiates a picker that lets the user toggle many options in a single
+    curses session. Returns a list of chosen options.
     """
-    def get_options(options, chosen):
-        return [options[i] for i, c in enumerate(chosen) if c]
-
-    def get_verbose_options(verbose_options, chosen):
-        no, yes = ' ', '✔'
-        if sys.version_info < (3, 3):
-            no, yes = ' ', '@'
-        opts = ['{} {}'.format(yes if c else no, verbose_options[i]) for i, c in enumerate(chosen)]
-        return opts + ['{}{}'.format('  ', kwargs.get('done', 'done...'))]
-
-    options, verbose_options = prepare_options(args)
-    chosen = [False] * len(options)
-    index = kwargs.get('idx', 0)
-
+    from .picker import Picker
+    options = as_options(args)
     default = kwargs.get('default', None)
     if isinstance(default, list):
-        for idx in default:
-            chosen[idx] = True
-    if isinstance(default, int):
-        chosen[default] = True
-
-    while True:
-        try:
-            index = one(prompt, *get_verbose_options(verbose_options, chosen), return_index=True, idx=index)
-        except QuestionnaireGoBack:
-            if any(chosen):
-                raise QuestionnaireGoBack(0)
-            else:
-                raise QuestionnaireGoBack
-        if index == len(options):
-            return get_options(options, chosen)
-        chosen[index] = not chosen[index]
-
-
-def prepare_options(options):
-    """Create options and verbose options from strings and non-string iterables in
-    `options` array.
+        chosen = set(default)
+    elif isinstance(default, int):
+        chosen = {default}
+    else:
+        chosen = set()
+
+    picker = Picker(options, title=prompt, index=kwargs.get('idx', 0),
+                    chosen=chosen, done=kwargs.get('done', 'done...'))
+    index = start(picker, kwargs.get('renderer'))
+    if index is None:
+        if chosen:
+            raise QuestionnaireGoBack(0)
+        raise QuestionnaireGoBack
+    return [options.value(i) for i in sorted(chosen)]
+
+
+def start(picker, renderer=None):
+    """Starts `picker` on `renderer`, or in a curses screen if `renderer` is
+    `None`.
+    """
+    if renderer is not None:
+        with renderer:
+            return picker.start(renderer)
+    with stdout_redirection:
+        return picker.start()
+
+
+class Options(object):
+    """Read-only view of the options passed to a prompter. Each option is a
+    string, or a `(value, label)` tuple, and is only split into its value and
+    label when it's accessed.
+
+    Pass an `Options` instance as the only option to a prompter instead of
+    `*args` options, e.g. `one(prompt, Options(repos))`. Sequences are indexed
+    without copying them, and any other iterable is consumed in chunks of
+    `chunk_size` options, as far as the user scrolls.
+
+    `options` can also be a function that returns options. It's called the
+    first time options are accessed, or on a worker thread when `prefetch` is
+    called. Each session asks questions with its own copy of such options (see
+    `session.Session.prompter_args`), so options are fetched with its answers.
     """
-    options_, verbose_options = [], []
-    for option in options:
-        if is_string(option):
-            options_.append(option)
-            verbose_options.append(option)
+    def __init__(self, options, chunk_size=100):
+        self.chunk_size = chunk_size
+        self.generation = 0  # number of times options were refreshed, so copies know they're stale
+        self._source, self._thread, self._error = None, None, None
+        self.filter_index = None  # built by the picker the first time options are filtered
+        self._function = options if callable(options) else None
+        if callable(options):
+            self._items, self._iterator, self._source = [], None, options
+        else:
+            self._set(options)
+
+    def _set(self, options):
+        if hasattr(options, '__getitem__') and hasattr(options, '__len__'):
+            self._items, self._iterator = options, None
         else:
-            options_.append(option[0])
-            verbose_options.append(option[1])
-    return options_, verbose_options
+            self._items, self._iterator = [], iter(options)
+
+    def _fetch(self, i):
+        """Calls options function if necessary, and consumes the iterable until
+        there is an option at index `i` or there are no more options.
+        """
+        if self._source is not None:
+            options = self._source()  # if it fails, it's called again the next time options are accessed
+            self._source = None
+            self._set(options)
+        if self._iterator is None or i < len(self._items):
+            return
+        n = max(i + 1, len(self._items) + self.chunk_size)
+        self._items.extend(islice(self._iterator, n - len(self._items)))
+        if len(self._items) < n:
+            self._iterator = None
+
+    def prefetch(self):
+        """Starts fetching the first chunk of options on a worker thread, if
+        they haven't been fetched yet.
+        """
+        if self._thread is not None or self._source is None and (self._iterator is None or self._items):
+            return
+        import threading
+
+        def fetch():
+            try:
+                self._fetch(self.chunk_size - 1)
+            except Exception as e:
+                self._error = e
+        self._thread = threading.Thread(target=fetch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def refresh(self):
+        """Drops options fetched from an options function, so it's called again
+        the next time options are accessed, here and in copies made by `copy`.
+        Other options can't be refreshed.
+        """
+        if self._function is None:
+            return
+        if self._thread is not None:
+            self._thread.join()
+        self._items, self._iterator, self._source = [], None, self._function
+        self._thread, self._error, self.filter_index = None, None, None
+        self.generation += 1
+
+    def copy(self):
+        """Returns new `Options` that fetch options from the same options
+        function, but haven't fetched them yet.
+        """
+        return Options(self._function, self.chunk_size)
+
+    @property
+    def fetched(self):
+        """`True` if all options are in memory, so reading them won't call an
+        options function or consume an iterator.
+        """
+        return self._source is None and self._iterator is None and self._thread is None
+
+    def has(self, i):
+        """Returns `True` if there is an option at index `i`, fetching options as
+        far as needed.
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+        self._fetch(i)
+        return 0 <= i < len(self._items)
+
+    def __len__(self):
+        self.has(sys.maxsize)
+        return len(self._items)
+
+    def __getitem__(self, i):
+        self.has(i)
+        return self._items[i]
+
+    def __iter__(self):
+        i = 0
+        while self.has(i):
+            yield self._items[i]
+            i += 1
+
+    def value(self, i):
+        option = self[i]
+        return option if is_string(option) else option[0]
+
+    def label(self, i):
+        option = self[i]
+        return option if is_string(option) else option[1]
+
+
+def as_options(args):
+    """Returns the `Options` instance passed as the only arg to a prompter, or
+    wraps the args in an `Options` instance. A function or iterator passed as
+    the only arg is wrapped as is.
+    """
+    if len(args) == 1:
+        if isinstance(args[0], Options):
+            return args[0]
+        if is_lazy(args[0]):
+            return Options(args[0])
+    return Options(args)
+
+
+def is_lazy(thing):
+    """Returns `True` if `thing` is a function or iterator that provides options.
+    """
+    return callable(thing) or hasattr(thing, '__next__') or hasattr(thing, 'next')
 
 
 @register(key='raw')
@@ -132,10 +248,24 @@ def raw(prompt, *args, **kwargs):
     go_back = kwargs.get('go_back', '<')
     type_ = kwargs.get('type', str)
     default = kwargs.get('default', '')
-    with stdout_redirected(sys.stderr):
+    renderer = kwargs.get('renderer')
+    if renderer is not None:
+        with renderer:
+            error = ''
+            while True:
+                answer = renderer.readline(error + prompt, secret=kwargs.get('secret', False)) or default
+                if answer == go_back:
+                    raise QuestionnaireGoBack
+                try:
+                    return type_(answer)
+                except ValueError:
+                    error = '`{}` is not a valid `{}`\n\n'.format(answer, type_)
+
+    with stdout_redirection:
         while True:
             try:
                 if kwargs.get('secret', False):
+                    import getpass
                     answer = getpass.getpass(prompt)
                 elif sys.version_info < (3, 0):
                     answer = raw_input(prompt)
@@ -152,6 +282,65 @@ def raw(prompt, *args, **kwargs):
                 eprint('\n`{}` is not a valid `{}`\n'.format(answer, type_))
 
 
+NO_ANSWER = object()  # passed to `headless` if there's no answer to a question
+
+
+def headless(prompter, answer, args, kwargs):
+    """Returns `answer` as core `prompter` would have returned it if the user had
+    entered it, so questions can be answered without prompting. Applies `type`
+    and `default` of `raw`, and checks answers to `one` and `many` are among
+    their options. Answers to other prompters are returned as is.
+
+    Returns `NO_ANSWER` if `answer` is `NO_ANSWER` and the prompter has no
+    default. Raises `ValueError` if the prompter couldn't have returned `answer`.
+    """
+    if prompter is raw:
+        if answer is NO_ANSWER:
+            if 'default' not in kwargs:
+                return NO_ANSWER
+            answer = kwargs['default']
+        elif answer == '':
+            answer = kwargs.get('default', '')
+        type_ = kwargs.get('type', str)
+        try:
+            return type_(answer)
+        except (TypeError, ValueError):
+            raise ValueError('`{}` is not a valid `{}`'.format(answer, type_))
+
+    if prompter is one:
+        options = as_options(args)
+        if answer is NO_ANSWER:
+            if 'idx' not in kwargs:
+                return NO_ANSWER
+            answer = kwargs['idx'] if kwargs.get('return_index', False) else options.value(kwargs['idx'])
+        if kwargs.get('return_index', False):
+            if isinstance(answer, int) and not isinstance(answer, bool) and answer >= 0 and options.has(answer):
+                return answer
+            raise ValueError('`{}` is not the index of an option'.format(answer))
+        if answer not in [options.value(i) for i in range(len(options))]:
+            raise ValueError('`{}` is not one of the options'.format(answer))
+        return answer
+
+    if prompter is many:
+        options = as_options(args)
+        values = [options.value(i) for i in range(len(options))]
+        if answer is NO_ANSWER:
+            default = kwargs.get('default', None)
+            if default is None:
+                return NO_ANSWER
+            return [values[i] for i in sorted(set(default if isinstance(default, list) else [default]))]
+        if not isinstance(answer, (list, tuple)):
+            raise ValueError('`{}` is not a list of options'.format(answer))
+        chosen = set()
+        for value in answer:
+            if value not in values:
+                raise ValueError('`{}` is not one of the options'.format(value))
+            chosen.add(values.index(value))
+        return [values[i] for i in sorted(chosen)]  # in the order `many` returns them
+
+    return answer
+
+
 @contextmanager
 def stdout_redirected(to):
     """Lifted from: https://stackoverflow.com/questions/4675728/redirect-stdout-to-a-file-in-python
@@ -179,6 +368,87 @@ def stdout_redirected(to):
             os.dup2(copied.fileno(), stdout_fd)
 
 
+class StdoutRedirection(object):
+    """Re-entrant version of `stdout_redirected(sys.stderr)`, used by the core
+    prompters. Entering it redirects stdout to stderr, and stdout is restored
+    when the outermost context exits.
+
+    `Questionnaire.run` holds it open for the whole run with `held`, so stdout
+    is redirected the first time a prompter needs it, and stays redirected
+    until the run is over, instead of being copied and restored around every
+    prompt. Prompters called on their own redirect stdout just for the call.
+    """
+    def __init__(self):
+        self.depth = 0  # number of open contexts
+        self.fd = None  # fd of stdout
+        self.saved = None  # copy of stdout's fd, made the first time stdout is redirected
+        self.redirected = False
+
+    def __enter__(self):
+        self.depth += 1
+        try:
+            self.redirect()
+        except Exception:
+            self.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    @contextmanager
+    def held(self):
+        """Keeps stdout redirected, once a prompter redirects it, until context
+        exits.
+        """
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @contextmanager
+    def suspended(self):
+        """Restores stdout until context exits, e.g. to write answers to it
+        while it's held.
+        """
+        redirected = self.redirected
+        self.restore()
+        try:
+            yield
+        finally:
+            if redirected:
+                self.redirect()
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.restore()
+            if self.saved is not None:
+                os.close(self.saved)
+                self.fd = self.saved = None
+
+    def redirect(self):
+        if self.redirected:
+            return
+        sys.stdout.flush()  # flush library buffers that dup2 knows nothing about
+        if self.saved is None:
+            self.fd = fileno(sys.stdout)
+            self.saved = os.dup(self.fd)  # copy stdout's fd before it's overwritten
+        os.dup2(fileno(sys.stderr), self.fd)
+        self.redirected = True
+
+    def restore(self):
+        if not self.redirected:
+            return
+        sys.stdout.flush()
+        os.dup2(self.saved, self.fd)
+        self.redirected = False
+
+
+stdout_redirection = StdoutRedirection()
+
+
 def fileno(file_or_fd):
     fd = getattr(file_or_fd, 'fileno', lambda: file_or_fd)()
     if not isinstance(fd, int):
@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""A `Questionnaire` is a thin wrapper around two objects. A `Definition` is the
+compiled, immutable form of the questions in a questionnaire, and a `Session`
+holds the state of one run through these questions: answers, the cursor, and
+undo/redo history.
+
+Many sessions can share one definition, e.g. to serve many users at once:
+
+    definition = q.compile()
+    session = Session(definition)
+    question = session.next_question
+    error = session.submit(answer, question)
+"""
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from itertools import islice
+
+from .prompters import Options
+
+
+_MISSING = object()  # previous value of a key that had no answer
+
+
+class Answers(OrderedDict):
+    """Answers of a session, in the order they were given. Changing them
+    directly, e.g. with `del q.answers[key]`, invalidates what the session
+    resolved from them, and is recorded in the session's history and outputs,
+    just like answers given by the user are, so it can be undone by `go_back`.
+    """
+    def __init__(self, *args, **kwargs):
+        self.session = None  # set after `__init__`, which calls `__setitem__`
+        OrderedDict.__init__(self, *args, **kwargs)
+
+    @contextmanager
+    def unrecorded(self):
+        """Changes made in the context aren't recorded as direct changes, e.g.
+        because the session records them itself.
+        """
+        session, self.session = self.session, None
+        try:
+            yield
+        finally:
+            self.session = session
+
+    def changed(self, key, previous):
+        if self.session is not None:
+            self.session.edited(key, previous)
+
+    def __setitem__(self, key, value):
+        previous = self.get(key, _MISSING)
+        with self.unrecorded():
+            OrderedDict.__setitem__(self, key, value)
+        self.changed(key, previous)
+
+    def __delitem__(self, key):
+        previous = self[key]
+        with self.unrecorded():
+            OrderedDict.__delitem__(self, key)
+        self.changed(key, previous)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return OrderedDict.pop(self, key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self, last=True):
+        if not self:
+            raise KeyError('dictionary is empty')
+        key = next(reversed(self) if last else iter(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in OrderedDict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        items = list(self.items())
+        with self.unrecorded():
+            OrderedDict.clear(self)
+        for key, value in reversed(items):  # undone in reverse, so keys are restored in order
+            self.changed(key, value)
+
+
+class Definition(object):
+    """Compiled questions of a questionnaire, and the dependency index from
+    answer keys to the positions of question keys whose conditions read them.
+    Options built from an options function are indexed by position, and by the
+    answer keys whose changes make sessions fetch them again.
+    """
+    __slots__ = ('keys', 'questions', 'positions', 'dependents', 'padding', 'fetched', 'refetched')
+
+    def __init__(self, questions):
+        """`questions` maps each key to a list of `Question` instances.
+        """
+        self.keys = tuple(questions.keys())
+        self.questions = tuple(tuple(qs) for qs in questions.values())
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        dependents = {}
+        for i, qs in enumerate(self.questions):
+            for question in qs:
+                if not question._condition:
+                    continue
+                for c in question._condition.conditions:
+                    dependents.setdefault(c.key, set()).add(i)
+        self.dependents = {key: tuple(sorted(positions)) for key, positions in dependents.items()}
+        self.fetched = {}  # position -> `Options` built from an options function, see `Session.prompter_args`
+        for i, qs in enumerate(self.questions):
+            fetched = tuple(arg for question in qs for arg in question.prompter_args
+                            if isinstance(arg, Options) and arg._function is not None)
+            if fetched:
+                self.fetched[i] = fetched
+        self.refetched = {}  # answer key -> `Options` whose questions' conditions read it
+        for key, positions in self.dependents.items():
+            refetched = tuple(options for i in positions for options in self.fetched.get(i, ()))
+            if refetched:
+                self.refetched[key] = refetched
+        self.padding = max([len(key) for key in self.keys] or [0]) + 5  # width of key column in `answer_display`
+
+
+class Session(object):
+    """State of one run through a `Definition`. Pass `history_size` to cap the
+    number of entries kept for undo and redo.
+    """
+    __slots__ = ('definition', 'answers', 'cursor', 'resolved', 'journal', 'undone',
+                 'lines', 'display', 'padding', 'history_size', 'pending', 'outputs', 'given', 'options')
+
+    def __init__(self, definition=None, answers=None, history_size=None):
+        self.definition = definition
+        self.history_size = history_size
+        self.padding = None
+        self.pending = None  # future for validation of an answer by `aio.aask`
+        self.outputs = []  # `stream.AnswerStream` instances that changes to answers are written to
+        self.reset(answers)
+
+    def reset(self, answers=None):
+        """Replaces the answers, and invalidates every resolved question.
+        """
+        self.answers = Answers(answers or ())
+        self.answers.session = self
+        self.cursor = 0
+        self.resolved = {}  # position -> `Question` to ask, or `None` if key is skipped
+        self.journal = deque(maxlen=self.history_size)  # (key, previous answer, question)
+        self.undone = deque(maxlen=self.history_size)  # (key, answer, question), answers that can be redone
+        self.lines = {}  # key -> rendered line in `answer_display`
+        self.display = None  # (max_answers_shown, rendered answers)
+        self.given = {}  # `Question` -> last answer its prompter gave, if question pre-fills it (see `cache`)
+        self.options = {}  # `Options` of the definition -> (its generation, session's copy), see `prompter_args`
+        for output in self.outputs:
+            output.reset(self.answers)
+
+    def bind(self, definition):
+        """Runs session against a new definition, e.g. after questions are added
+        or removed, keeping answers and history.
+        """
+        self.definition = definition
+        self.cursor = 0
+        self.resolved = {}
+
+    @property
+    def next_question(self):
+        """Returns the next `Question`, or `None` if there are no questions left.
+        Returns first question for whose key there is no answer and for which
+        condition is satisfied, or for which there is no condition.
+
+        Scanning starts from a cursor instead of the first key. Every key before
+        the cursor is either answered or skipped, and the cursor only moves back
+        when an answer that one of these keys depends on changes.
+        """
+        keys, answers = self.definition.keys, self.answers
+        i = self.cursor
+        while i < len(keys):
+            if keys[i] not in answers:
+                question = self.resolve(i)
+                if question is not None:
+                    self.cursor = i
+                    return question
+            i += 1
+        self.cursor = i
+        return None
+
+    def resolve(self, i):
+        """Returns the first question for the key at position `i` whose
+        condition is satisfied, or `None`. Result is cached until an answer
+        the question's conditions depend on changes.
+        """
+        try:
+            return self.resolved[i]
+        except KeyError:
+            pass
+        for question in self.definition.questions[i]:
+            if self.check_condition(question._condition):
+                break
+        else:
+            question = None
+        self.resolved[i] = question
+        return question
+
+    def check_condition(self, condition):
+        """Helper that returns True if condition is satisfied/doesn't exist.
+        """
+        if not condition:
+            return True
+        for c in condition.conditions:
+            key, value, operator = c
+            if not operator(self.answers[key], value):
+                return False
+        return True
+
+    def prefetch(self, n):
+        """Starts fetching lazy options for the next `n` questions after the
+        cursor. Stops at the first question whose condition depends on an answer
+        that isn't known yet.
+        """
+        keys, found = self.definition.keys, 0
+        for j in range(self.cursor + 1, len(keys)):
+            if found >= n:
+                return
+            if keys[j] in self.answers:
+                continue
+            try:
+                question = self.resolve(j)
+            except KeyError:
+                return
+            if question is None:
+                continue
+            found += 1
+            for arg in self.prompter_args(question):
+                if isinstance(arg, Options):
+                    arg.prefetch()
+
+    def prompter_args(self, question):
+        """Args the question's prompter is called with. `Options` built from an
+        options function are replaced by the session's own copies, so they're
+        fetched with its answers, and fetched again when an answer the
+        question's conditions read changes.
+        """
+        fetched = self.definition.fetched.get(self.definition.positions.get(question.key))
+        if fetched is None:
+            return question.prompter_args
+        return tuple(self.copy_options(arg) if arg in fetched else arg
+                     for arg in question.prompter_args)
+
+    def copy_options(self, options):
+        """Returns the session's copy of `options`, making a new one if there is
+        none yet, or if `options` were refreshed since it was made.
+        """
+        generation, copy = self.options.get(options, (None, None))
+        if generation != options.generation:
+            copy = options.copy()
+            self.options[options] = (options.generation, copy)
+        return copy
+
+    def submit(self, answer, question=None):
+        """Answers `question`, or the next question, with `answer`. The answer is
+        validated and transformed just like an answer from a prompter. Returns
+        the validation error if the answer is invalid, in which case it isn't
+        recorded. Raises `ValueError` if there's no question to answer.
+        """
+        q = self.question_to_answer(question)
+        error, transformed = q.process(answer)
+        if error:
+            return error
+        self.remember(q, answer)
+        self.accept(transformed, q)
+
+    def question_to_answer(self, question=None):
+        """Returns `question`, or the next question. Raises `ValueError` if there
+        is neither, i.e. there are no questions left.
+        """
+        q = question or self.next_question
+        if q is None:
+            raise ValueError('no question left to answer')
+        return q
+
+    def remember(self, question, answer):
+        """Remembers valid `answer` before it's transformed, if `question` is
+        cached and pre-fills it when it's asked again.
+        """
+        if question._cache is not None and question._cache.prefill:
+            self.given[question] = answer
+
+    def accept(self, answer, question):
+        """Records an answer that has already been validated and transformed.
+        """
+        self.undone.clear()
+        self.set_answer(question.key, answer, question)
+
+    def invalidate(self, key):
+        """Drop cached resolutions that depend on the answer to `key`, and move
+        the cursor back to the earliest key that might need to be asked. The
+        session's copies of options fetched from an options function by
+        questions whose conditions read `key` are dropped too, so they're
+        fetched again with the new answer.
+        """
+        self.lines.pop(key, None)
+        self.display = None
+        if self.definition is None:
+            return
+        position = self.definition.positions.get(key)
+        if position is not None and key not in self.answers:
+            self.cursor = min(self.cursor, position)
+        for i in self.definition.dependents.get(key, ()):
+            self.resolved.pop(i, None)
+            self.cursor = min(self.cursor, i)
+        for options in self.definition.refetched.get(key, ()):  # options function may read the answer too
+            self.options.pop(options, None)
+
+    def set_answer(self, key, answer, question=None):
+        """Set answer and push an entry onto the answer journal so it can be
+        undone by `go_back`.
+        """
+        self.journal.append((key, self.answers.get(key, _MISSING), question))
+        with self.answers.unrecorded():
+            self.answers[key] = answer
+        self.invalidate(key)
+        for output in self.outputs:
+            output.answer(key, answer)
+
+    def update(self, items):
+        """Sets answers from `(key, answer, question)` triples in one pass, as if
+        each was accepted in turn, and writes them to outputs in one batch.
+        """
+        self.undone.clear()
+        with self.answers.unrecorded():
+            for key, answer, question in items:
+                self.journal.append((key, self.answers.get(key, _MISSING), question))
+                self.answers[key] = answer
+                self.invalidate(key)
+        for output in self.outputs:
+            output.answer_many([(key, answer) for key, answer, _ in items])
+
+    def edited(self, key, previous):
+        """Records a direct change to the answer to `key`, e.g. by
+        `del q.answers[key]`, that replaced `previous`, so it can be undone by
+        `go_back` like an answer, and writes it to outputs.
+        """
+        self.undone.clear()
+        self.journal.append((key, previous, None))
+        self.invalidate(key)
+        answer = self.answers.get(key, _MISSING)
+        for output in self.outputs:
+            if answer is _MISSING:
+                output.delete(key)
+            else:
+                output.answer(key, answer)
+
+    def pop_answer(self):
+        """Undo the most recent answer, or direct change to the answers,
+        restoring the key's previous value if it had one, and push the undone
+        answer onto the redo stack. If the journal was truncated by
+        `history_size`, the last answer is simply removed.
+        """
+        with self.answers.unrecorded():
+            if self.journal:
+                key, previous, question = self.journal.pop()
+                answer = self.answers.get(key, _MISSING)  # missing if answer was deleted directly
+                if previous is _MISSING:
+                    self.answers.pop(key, None)
+                else:
+                    self.answers[key] = previous  # key keeps its position
+            else:
+                (key, answer), question, previous = self.answers.popitem(), None, _MISSING
+        self.invalidate(key)
+        if answer is not _MISSING:
+            self.undone.append((key, answer, question))
+        for output in self.outputs:
+            output.retract(key)
+            if previous is not _MISSING:
+                output.restore(key, previous)
+
+    def go_back(self, n=1):
+        """Removes the last `n` answers, and cancels pending validation of an
+        answer, if there is one.
+        """
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        for _ in range(abs(n)):
+            if not self.journal and not self.answers:
+                break
+            self.pop_answer()
+
+    def redo(self, n=1):
+        """Replay up to `n` answers undone by `go_back`. Stops at the first answer
+        whose question is no longer the next question, e.g. because an earlier
+        answer changed. Returns the number of answers replayed.
+        """
+        replayed = 0
+        while replayed < n and self.undone:
+            key, answer, question = self.undone[-1]
+            next_question = self.next_question
+            if next_question is None or next_question.key != key or \
+                    question is not None and next_question is not question:
+                self.undone.clear()
+                break
+            self.undone.pop()
+            self.set_answer(key, answer, next_question)
+            replayed += 1
+        return replayed
+
+    def answer_display(self, max_answers_shown=None):
+        """Answers so far, or the last `max_answers_shown` answers. Each answer's
+        line is rendered once and cached until the answer changes, and the whole
+        display is cached until any answer changes.
+        """
+        if self.padding != self.definition.padding:
+            self.padding = self.definition.padding
+            self.lines = {}
+            self.display = None
+        n = max_answers_shown
+        if self.display is None or self.display[0] != n:
+            keys = self.answers.keys()
+            if n is not None:
+                keys = reversed(list(islice(reversed(self.answers), n)))
+            self.display = (n, ''.join(self.answer_line(key) for key in keys))
+        return self.display[1]
+
+    def answer_line(self, key):
+        try:
+            return self.lines[key]
+        except KeyError:
+            line = self.lines[key] = '{:>{}} : {}\n'.format(key, self.padding, self.answers[key])
+            return line
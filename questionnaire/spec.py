@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""Builds questionnaires from declarative specs, i.e. dicts that can be loaded
+from JSON:
+
+    {
+        "show_answers": true,
+        "questions": [
+            {"key": "day", "prompter": "one", "options": ["monday", "friday"]},
+            {"key": "time", "prompter": "one", "options": [["am", "morning"], ["pm", "night"]]},
+            {"key": "drink", "prompter": "many", "options": ["beer", "mezcal"],
+             "condition": [["time", "pm"], ["day", "monday", "!="]]},
+            {"key": "age", "prompter": "raw", "prompt": "How old are you?", "type": "int"}
+        ]
+    }
+
+Besides `questions`, a spec can set any of `OPTIONS`. Each question has a `key`,
+a core `prompter`, and optionally a `prompt`, `options` for `one` and `many`
+(strings, or `[value, label]` pairs), and a `condition` made of `[key, value]` or
+`[key, value, operator]` conditions with built-in or registered operators (see
+`register_operator`). Any other fields, like `default` or `type` (one of
+`TYPES`), are passed to the prompter.
+
+`load` caches built questionnaires on disk, keyed by a hash of the spec file and
+of the package's source, so a spec is only parsed and checked the first time
+it's loaded by a version of the package:
+
+    q = load('questions.json')
+    q.run()
+"""
+from __future__ import print_function
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+
+from . import Questionnaire, Condition, prompters, operators, is_string, _changes
+
+
+OPTIONS = ('show_answers', 'can_go_back', 'history_size', 'max_answers_shown', 'max_retries', 'prefetch')
+TYPES = {'str': str, 'int': int, 'float': float}
+
+
+class SpecError(ValueError):
+    """Signals a spec isn't valid. The message says where the problem is."""
+
+
+def build(spec):
+    """Returns a `Questionnaire` built from `spec`, a dict or a list of questions.
+    Raises `SpecError` if `spec` isn't valid.
+    """
+    if isinstance(spec, list):
+        spec = {'questions': spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get('questions'), list):
+        raise SpecError('spec must be a list of questions, or a dict with a list of questions')
+    unknown = set(spec) - set(OPTIONS) - {'questions'}
+    if unknown:
+        raise SpecError('unknown options: {}'.format(', '.join(sorted(unknown))))
+
+    q = Questionnaire(**spec_options(spec))
+    keys = set(question.get('key') for question in spec['questions'] if isinstance(question, dict))
+    for i, question in enumerate(spec['questions']):
+        where = 'questions[{}]'.format(i)
+        if not isinstance(question, dict):
+            raise SpecError('{}: question must be a dict'.format(where))
+        args, kwargs, conditions = parse_question(question, keys, where)
+        question = q.add(*args, **kwargs)
+        if conditions:
+            question.condition(*conditions)
+    q.compile()
+    return q
+
+
+def spec_options(spec):
+    """Returns the questionnaire options set by `spec`.
+    """
+    return {option: spec[option] for option in OPTIONS if option in spec} if isinstance(spec, dict) else {}
+
+
+def parse_question(question, keys, where):
+    """Returns args and kwargs for `Questionnaire.add`, and the question's
+    conditions, or `None`.
+    """
+    question = dict(question)
+    key = question.pop('key', None)
+    if not key or not is_string(key):
+        raise SpecError('{}: key must be a non-empty string'.format(where))
+    where = '{} ({})'.format(where, key)
+
+    prompter = question.pop('prompter', None)
+    if prompter not in prompters:
+        raise SpecError('{}: prompter must be one of {}'.format(where, ', '.join(sorted(prompters))))
+    options = question.pop('options', None)
+    if prompter in ('one', 'many'):
+        if not isinstance(options, list) or not options:
+            raise SpecError('{}: options must be a non-empty list'.format(where))
+        options = list(options)
+        for j, option in enumerate(options):
+            if isinstance(option, list):
+                if len(option) != 2:
+                    raise SpecError('{}: options[{}] must be a string or a [value, label] pair'.format(where, j))
+                options[j] = tuple(option)
+    elif options is not None:
+        raise SpecError('{}: {} prompter takes no options'.format(where, prompter))
+
+    if 'type' in question:
+        if question['type'] not in TYPES:
+            raise SpecError('{}: type must be one of {}'.format(where, ', '.join(sorted(TYPES))))
+        question['type'] = TYPES[question['type']]
+
+    conditions = question.pop('condition', None)
+    if conditions is not None:
+        if not isinstance(conditions, list) or not conditions:
+            raise SpecError('{}: condition must be a non-empty list'.format(where))
+        for j, c in enumerate(conditions):
+            if not isinstance(c, list) or len(c) not in (2, 3):
+                raise SpecError('{}: condition[{}] must be [key, value] or [key, value, operator]'.format(where, j))
+            if c[0] not in keys:
+                raise SpecError("{}: condition[{}] depends on unknown key '{}'".format(where, j, c[0]))
+            if len(c) == 3 and c[2] not in Condition.OPERATORS and c[2] not in operators:
+                raise SpecError('{}: condition[{}] operator must be one of {}'.format(
+                    where, j, ' '.join(sorted(Condition.OPERATORS) + sorted(operators))))
+
+    question['prompter'] = prompter
+    return [key] + (options or []), question, conditions
+
+
+_package_digest = []  # hash of the package's source, computed the first time it's needed
+
+
+def package_digest():
+    """Returns the SHA-256 hash of the package's source files, so questionnaires
+    cached by a different version of the package are never loaded.
+    """
+    if not _package_digest:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                with open(os.path.join(directory, name), 'rb') as f:
+                    digest.update(name.encode() + b'\0' + f.read())
+        _package_digest.append(digest.hexdigest())
+    return _package_digest[0]
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'questionnaire')
+
+
+def load(path, cache_dir=None, use_cache=True):
+    """Returns a `Questionnaire` built from the JSON spec at `path`. The options
+    and compiled `Definition` of built questionnaires are pickled to `cache_dir`
+    (`~/.cache/questionnaire` by default), in a file named for the SHA-256 hash
+    of the spec and of the package's source, so loading the same spec again
+    only unpickles them, and binds them to a new session. Registered operators
+    are cached by name, so they're looked up again when a cached questionnaire
+    is loaded.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    if not use_cache:
+        return build(json.loads(content.decode('utf-8')))
+
+    cache_dir = cache_dir or default_cache_dir()
+    digest = hashlib.sha256(content)
+    digest.update('{}:{}'.format(package_digest(), sys.version_info[:2]).encode())
+    cached = os.path.join(cache_dir, digest.hexdigest() + '.pickle')
+    try:
+        with open(cached, 'rb') as f:
+            return restore(*pickle.load(f))
+    except Exception:  # not cached yet, or cached by an incompatible version
+        pass
+
+    spec = json.loads(content.decode('utf-8'))
+    q = build(spec)
+    try:
+        save((spec_options(spec), q.compile()), cache_dir, cached)
+    except (IOError, OSError, pickle.PicklingError, AttributeError, TypeError):
+        pass  # questionnaire can still be used if it can't be cached, e.g. a registered prompter is a lambda
+    return q
+
+
+def restore(options, definition):
+    """Returns a new `Questionnaire` with `options`, whose questions are those
+    of the compiled `definition`.
+    """
+    q = Questionnaire(**options)
+    for key, questions in zip(definition.keys, definition.questions):
+        q.questions[key] = list(questions)
+    q._definition, q._compiled = definition, _changes[0]  # questions are already compiled
+    return q
+
+
+def save(cached, cache_dir, path):
+    """Atomically writes pickled questionnaire options and definition to `path`,
+    so they're never loaded from a partly written file.
+    """
+    from .checkpoint import replace
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    fd, temp = tempfile.mkstemp(dir=cache_dir, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(cached, f, protocol=2)
+        replace(temp, path)
+    except Exception:
+        os.remove(temp)
+        raise
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run a questionnaire from a JSON spec.')
+    parser.add_argument('spec', help='JSON spec file')
+    parser.add_argument('--fmt', default='obj', choices=('obj', 'array', 'plain'))
+    parser.add_argument('--no-cache', action='store_true', help="don't read or write the questionnaire cache")
+    args = parser.parse_args(argv)
+
+    try:
+        q = load(args.spec, use_cache=not args.no_cache)
+    except SpecError as e:
+        print('{}: {}'.format(args.spec, e), file=sys.stderr)
+        return 1
+    q.run()
+    print(q.format_answers(args.fmt))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Streams answers as they're given, one line of JSON per record, so consumers
+can start working before the questionnaire is done:
+
+    q.stream_answers(sys.stdout)
+    q.run()
+
+Each record has a sequence number, an `op`, and a question key:
+
+    {"seq": 1, "op": "answer", "key": "region", "value": "us-east-1"}
+    {"seq": 2, "op": "retract", "key": "region"}
+
+An `answer` record sets the answer to a key, and a `retract` record removes it,
+e.g. because the user went back. If going back restores an earlier answer to
+the key, the `retract` record is followed by a `restore` record with the same
+fields as an `answer` record, and the key keeps its position. A `delete` record removes the answer to a key
+that was deleted from the answers directly, e.g. with `del q.answers[key]`. A
+`reset` record has no key, and replaces all answers with its `answers`, a list
+of `[key, value]` pairs.
+
+Prompters redirect stdout to stderr (see `prompters.StdoutRedirection`). If
+records are streamed to stdout, it's restored while they're written.
+"""
+import json
+import sys
+from collections import OrderedDict
+
+from .prompters import stdout_redirection, fileno
+
+
+class AnswerStream(object):
+    """Writes answer records to file object `f`. Each record is written with a
+    single call to `write`, and `f` is flushed after each record.
+    """
+    def __init__(self, f):
+        self.f = f
+        self.seq = 0
+
+    def write(self, op, *fields):
+        self.seq += 1
+        record = OrderedDict([('seq', self.seq), ('op', op)] + list(fields))
+        line = json.dumps(record) + '\n'
+        if not self.writes_to_stdout():
+            self.f.write(line)
+            self.f.flush()
+            return
+        with stdout_redirection.suspended():
+            self.f.write(line)
+            self.f.flush()
+
+    def writes_to_stdout(self):
+        """Returns `True` if `f` writes to stdout's file descriptor.
+        """
+        try:
+            return fileno(self.f) == fileno(sys.stdout)
+        except (ValueError, OSError):  # no file descriptor, e.g. `StringIO`
+            return False
+
+    def answer(self, key, value):
+        self.write('answer', ('key', key), ('value', value))
+
+    def answer_many(self, items):
+        for key, value in items:
+            self.answer(key, value)
+
+    def retract(self, key):
+        self.write('retract', ('key', key))
+
+    def delete(self, key):
+        self.write('delete', ('key', key))
+
+    def restore(self, key, value):
+        self.write('restore', ('key', key), ('value', value))
+
+    def reset(self, answers):
+        self.write('reset', ('answers', [[key, value] for key, value in answers.items()]))
+
+
+def read_answers(lines):
+    """Returns the answers described by a stream of records, in the order they
+    were given. An answer restored by a `restore` record keeps its position, as
+    it does in the session.
+    """
+    answers, retracted = OrderedDict(), None  # key of `retract` record, popped unless it's restored next
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        op = record['op']
+        if retracted is not None and not (op == 'restore' and record['key'] == retracted):
+            answers.pop(retracted, None)
+        retracted = None
+        if op in ('answer', 'restore'):
+            answers[record['key']] = record['value']
+        elif op == 'retract':
+            retracted = record['key']
+        elif op == 'delete':
+            answers.pop(record['key'], None)
+        elif op == 'reset':
+            answers = OrderedDict((key, value) for key, value in record['answers'])
+    if retracted is not None:
+        answers.pop(retracted, None)
+    return answers
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Listeners that time the steps of asking questions. Register one with
+`Questionnaire.listen`:
+
+    timings = q.listen(Timings(trace=open('trace.ndjson', 'w')))
+    q.run()
+    print(timings.format_summary())
+
+A listener is any function that accepts an event name, a question key and the
+number of seconds the event took. Events are `ask` (asking a question, until
+it's answered or the user goes back), `prompt` (the prompter call, i.e. render
+and think time), `validate`, `transform` and `next_question` (evaluating
+conditions to find the next question, whose key is passed, or `None`).
+"""
+import json
+import time
+from collections import OrderedDict
+
+
+clock = getattr(time, 'perf_counter', time.time)  # monotonic clock if there is one
+
+
+class Timings(object):
+    """Listener that counts events and sums their durations for each question
+    key and event. Pass a file object as `trace` to also write each event to it
+    as a line of JSON, as soon as it happens.
+    """
+    def __init__(self, trace=None):
+        self.trace = trace
+        self.stats = OrderedDict()  # (key, event) -> [count, total, min, max]
+
+    def __call__(self, event, key, seconds):
+        stats = self.stats.get((key, event))
+        if stats is None:
+            self.stats[(key, event)] = [1, seconds, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = min(stats[2], seconds)
+            stats[3] = max(stats[3], seconds)
+        if self.trace is not None:
+            self.trace.write(json.dumps({'time': time.time(), 'key': key, 'event': event, 'seconds': seconds}) + '\n')
+            self.trace.flush()
+
+    def summary(self):
+        """Returns a list with a dict of stats for each question key and event,
+        in the order they first happened.
+        """
+        return [{'key': key, 'event': event, 'count': count, 'total': total,
+                 'mean': total / count, 'min': min_, 'max': max_}
+                for (key, event), (count, total, min_, max_) in self.stats.items()]
+
+    def format_summary(self):
+        """Returns summary as a table.
+        """
+        lines = ['{:>20} {:>14} {:>6} {:>10} {:>10} {:>10}'.format('key', 'event', 'count', 'total', 'mean', 'max')]
+        for s in self.summary():
+            lines.append('{:>20} {:>14} {:>6} {:>10.6f} {:>10.6f} {:>10.6f}'.format(
+                str(s['key']), s['event'], s['count'], s['total'], s['mean'], s['max']))
+        return '\n'.join(lines)
+
+    def reset(self):
+        self.stats.clear()
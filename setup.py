@@ -12,7 +12,6 @@ setup(
     author_email='kylebebak@gmail.com',
     license='MIT',
     packages=['questionnaire'],
-    install_requires=['pick==0.6.4'],
     classifiers=[
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
@@ -0,0 +1,71 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import sys
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.timing import Timings
+
+if sys.version_info >= (3, 5):
+    import asyncio
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'requires asyncio with async/await')
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_arun(self):
+        answers = iter(['v_', 'v'])
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: asyncio.sleep(0, result=next(answers))).validate(
+            lambda a: asyncio.sleep(0, result=None if a == 'v' else 'error'))
+        q.add('k2', prompter=lambda prompt: 'v2').transform(lambda a: asyncio.sleep(0, result=a.upper()))
+        timings = q.listen(Timings())
+        self.assertEqual(dict(self.loop.run_until_complete(q.arun())), {'k': 'v', 'k2': 'V2'})
+        counts = {(s['key'], s['event']): s['count'] for s in timings.summary()}
+        self.assertEqual(counts[('k', 'prompt')], 2)
+        self.assertEqual(counts[('k', 'validate')], 2)
+        self.assertEqual(counts[('k2', 'transform')], 1)
+
+    def test_cache(self):
+        calls = []
+
+        def validate(a):
+            calls.append(a)
+            return asyncio.sleep(0, result=None if a == 'v' else 'error')
+
+        answers = iter(['v_', 'v_', 'v'])
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: next(answers)).cache().validate(validate)
+        self.assertEqual(dict(self.loop.run_until_complete(q.arun())), {'k': 'v'})
+        self.assertEqual(calls, ['v_', 'v'])
+
+    def test_concurrent_sessions(self):
+        def questionnaire(n):
+            q = Questionnaire()
+            q.add('k', prompter=lambda prompt: asyncio.sleep(0.01, result=n))
+            q.add('k2', prompter=lambda prompt: asyncio.sleep(0.01, result=n * 2))
+            return q
+
+        results = self.loop.run_until_complete(asyncio.gather(*[questionnaire(n).arun() for n in range(100)]))
+        self.assertEqual([dict(r) for r in results], [{'k': n, 'k2': n * 2} for n in range(100)])
+
+    def test_cancel_validation(self):
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2').validate(lambda a: asyncio.sleep(10))
+
+        self.loop.run_until_complete(q.aask())
+        self.loop.call_later(0.01, q.go_back)
+        self.assertIsNone(self.loop.run_until_complete(q.aask()))
+        self.assertEqual(dict(q.answers), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.analyze import analyze
+
+
+class TestAnalyze(unittest.TestCase):
+    def test_paths(self):
+        q = Questionnaire()
+        q.one('a', 'x', 'y')
+        q.one('b', 'p', 'q').condition(('a', 'x'))
+        q.many('b', 'm', 'n').condition(('a', 'y'))
+        q.one('c', 'z').condition(('b', ['m', 'n']))
+        q.one('never', 'z').condition(('a', 'w'))
+
+        report = analyze(q)
+        self.assertEqual(report.paths, 6)  # 2 answers to `b` if `a` is x, and 4 if it's y
+        self.assertEqual(report.error_paths, 0)
+        self.assertEqual((report.min_length, report.max_length), (2, 3))
+        self.assertAlmostEqual(report.mean_length, 13 / 6.0)
+        self.assertEqual(report.unreachable, [('never', 0)])
+        self.assertEqual(report.errors, [])
+
+        report = analyze(q, {'a': 'y'})
+        self.assertEqual(report.paths, 4)
+        self.assertEqual(report.unreachable, [('a', 0), ('b', 0), ('never', 0)])
+
+        report = analyze(q, max_many=1)  # answer to `many` question is unknown
+        self.assertEqual(report.paths, 4)  # `c` may or may not be asked if `a` is y
+
+    def test_errors(self):
+        q = Questionnaire()
+        q.one('a', 'x', 'y')
+        q.one('b', 'p').condition(('a', 'x'))
+        q.one('c', 'z').condition(('b', 'p'))
+        q.one('d', 'z').condition(('a', 1, '>'))
+
+        report = analyze(q)
+        self.assertEqual((report.paths, report.error_paths), (0, 2))
+        self.assertEqual(report.errors[0], ('c', 0, "condition reads 'b', which has no answer"))
+        self.assertEqual(report.errors[1][:2], ('d', 0))  # can't compare str to int in Python 3
+        self.assertEqual(report.unreachable, [('d', 0)])
+
+    def test_unknown_answers(self):
+        q = Questionnaire()
+        q.raw('age', type=int)
+        q.one('plans', 'school', 'work').condition(('age', 18, '<='))
+        q.one('plans', 'beach')
+        q.add('other', prompter=lambda prompt: 'v')
+        report = analyze(q)
+        self.assertEqual(report.paths, 3)
+        self.assertEqual(report.unreachable, [])
+
+    def test_long(self):
+        q = Questionnaire()
+        q.one('k0', 'a', 'b')
+        for i in range(1, 5000):
+            q.one('k{}'.format(i), 'a', 'b').condition(('k{}'.format(i - 1), 'a'))
+            q.one('k{}'.format(i), 'b')
+        report = analyze(q)
+        self.assertEqual(report.paths, 5001)  # index of first b, or all a
+        self.assertEqual((report.min_length, report.max_length), (5000, 5000))
+        self.assertEqual(report.states, 10000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import os
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.ansi import Terminal
+from questionnaire.prompters import one, many, raw
+
+
+class PipeTerminal(Terminal):
+    """Terminal that reads keys from, and writes to, pipes.
+    """
+    def __init__(self, keys=b'', size=(10, 40)):
+        self.keys_in, keys_out = os.pipe()
+        os.write(keys_out, keys)
+        os.close(keys_out)
+        self.screen_in, self.screen_out = os.pipe()
+        super(PipeTerminal, self).__init__(fd_in=self.keys_in, fd_out=self.screen_out, size=size)
+
+    def output(self):
+        os.close(self.screen_out)
+        with os.fdopen(self.screen_in, 'rb') as f:
+            data = f.read()
+        os.close(self.keys_in)
+        return data.decode('utf-8')
+
+
+class TestTerminal(unittest.TestCase):
+    def test_refresh_writes_changed_lines(self):
+        t = PipeTerminal()
+        t.clear()
+        t.addnstr(0, 0, 'first', 40)
+        t.addnstr(1, 0, 'second', 40)
+        t.refresh()
+        t.clear()
+        t.addnstr(0, 0, 'first', 40)
+        t.addnstr(1, 0, 'changed', 40)
+        t.refresh()
+        t.refresh()
+        out = t.output()
+        self.assertEqual(out.count('first'), 1)
+        self.assertEqual(out.count('second'), 1)
+        self.assertIn('\x1b[2;1Hchanged\x1b[K', out)
+        self.assertEqual(out.count('\x1b[2J'), 1)
+
+    def test_getch(self):
+        t = PipeTerminal(b'a\x1b[B\x1b[5~\x1b[Z')
+        import curses
+        self.assertEqual([t.getch() for _ in range(4)], [ord('a'), curses.KEY_DOWN, curses.KEY_PPAGE, -1])
+        self.assertRaises(EOFError, t.getch)
+        t.output()
+
+    def test_readline(self):
+        t = PipeTerminal(u'abd\x7fc \xe9\r'.encode('utf-8'))
+        self.assertEqual(t.readline('name: '), u'abc \xe9')
+        self.assertIn(u'name: abc \xe9', t.output())
+
+
+class TestPrompters(unittest.TestCase):
+    def test_one_and_many(self):
+        t = PipeTerminal(b'j\r')
+        self.assertEqual(one('day', 'monday', 'friday', renderer=t), 'friday')
+        t.output()
+
+        t = PipeTerminal(b' jj G\r')
+        self.assertEqual(many('drinks', 'beer', 'mezcal', 'water', renderer=t), ['beer', 'water'])
+        t.output()
+
+    def test_raw(self):
+        t = PipeTerminal(b'x\r30\r')
+        self.assertEqual(raw('age', type=int, renderer=t), 30)
+        self.assertIn('is not a valid', t.output())
+
+    def test_questionnaire(self):
+        t = PipeTerminal(b'bob\rj\r')
+        q = Questionnaire(renderer=t)
+        q.raw('name')
+        q.one('day', 'monday', 'friday')
+        self.assertEqual(q.run(), {'name': 'bob', 'day': 'friday'})
+        out = t.output()
+        self.assertEqual(out.count('name: bob'), 1)  # answers shown above second prompt only written once
+        self.assertEqual(out.count('\x1b[?1049h'), 1)  # terminal stays open between questions
+        self.assertEqual(t.depth, 0)
+
+    def test_custom_prompter(self):
+        t = PipeTerminal(b'bob\rj\r')
+        states = []
+
+        def prompter(prompt):
+            states.append((t.depth, t.lines))
+            return 'x'
+
+        q = Questionnaire(renderer=t)
+        q.raw('name')
+        q.add('custom', prompter=prompter)
+        q.one('day', 'monday', 'friday')
+        self.assertEqual(q.run(), {'name': 'bob', 'custom': 'x', 'day': 'friday'})
+        self.assertEqual(states, [(0, [])])  # terminal is restored for custom prompter
+        out = t.output()
+        self.assertEqual(out.count('\x1b[?1049h'), 2)  # and opened again for next core prompter
+        self.assertEqual(out.count('\x1b[?1049l'), 2)
+        self.assertTrue(out.endswith('\x1b[?25h\x1b[?1049l'))
+        self.assertEqual(t.depth, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import io
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.batch import replay, run_batch, load_records, BatchError
+
+
+def questionnaire():
+    q = Questionnaire()
+    q.one('day', 'monday', 'friday', 'saturday')
+    q.one('time', 'morning', 'night')
+    q.many('activities', 'tacos de pastor', 'go to cantina').condition(('time', 'night'))
+    q.raw('age', type=int).validate(lambda a: None if int(a) >= 18 else 'too young').transform(int)
+    return q
+
+
+class TestBatch(unittest.TestCase):
+    def test_replay(self):
+        q = questionnaire()
+        answers = replay(q, {'day': 'monday', 'time': 'morning', 'age': '20', 'activities': ['x']})
+        self.assertEqual(list(answers.items()), [('day', 'monday'), ('time', 'morning'), ('age', 20)])
+
+        with self.assertRaises(BatchError):
+            replay(q, {'day': 'monday', 'time': 'night', 'age': '20'})
+        with self.assertRaises(BatchError):
+            replay(q, {'day': 'monday', 'time': 'morning', 'age': 17})
+
+    def test_coerce(self):
+        q = Questionnaire()
+        q.raw('age', type=int)
+        q.raw('city', default='paris')
+        q.one('day', 'monday', ('fri', 'friday'))
+        q.many('drinks', 'beer', 'mezcal', 'water')
+        answers = replay(q, {'age': '30', 'day': 'fri', 'drinks': ['water', 'beer', 'water']})
+        self.assertEqual(list(answers.items()), [('age', 30), ('city', 'paris'), ('day', 'fri'),
+                                                 ('drinks', ['beer', 'water'])])
+        self.assertEqual(replay(q, {'age': 1, 'city': '', 'day': 'monday', 'drinks': []})['city'], 'paris')
+
+        for record, error in [
+            ({'age': 'abc'}, "invalid answer for 'age': `abc` is not a valid `{}`".format(int)),
+            ({'age': 1, 'day': 'sunday'}, "invalid answer for 'day': `sunday` is not one of the options"),
+            ({'age': 1, 'day': 'monday', 'drinks': ['tea']},
+             "invalid answer for 'drinks': `tea` is not one of the options"),
+            ({'age': 1, 'day': 'monday', 'drinks': 'beer'},
+             "invalid answer for 'drinks': `beer` is not a list of options"),
+            ({'age': 1}, "no answer for 'day'"),
+        ]:
+            with self.assertRaises(BatchError) as context:
+                replay(q, record)
+            self.assertEqual(str(context.exception), error)
+
+    def test_run_batch(self):
+        records = [
+            {'day': 'monday', 'time': 'night', 'activities': ['go to cantina'], 'age': 30},
+            {'day': 'friday', 'time': 'morning', 'age': 3},
+            {'day': 'saturday', 'time': 'morning', 'age': 40},
+        ] * 10
+        expected = [
+            (0, '{"day": "monday", "time": "night", "activities": ["go to cantina"], "age": 30}', None),
+            (1, None, "invalid answer for 'age': too young"),
+            (2, '{"day": "saturday", "time": "morning", "age": 40}', None),
+        ]
+        results = list(run_batch(questionnaire(), records))
+        self.assertEqual(results[:3], expected)
+        self.assertEqual(list(run_batch(questionnaire(), records, processes=2, chunksize=4)), results)
+
+    def test_load_records(self):
+        self.assertEqual(list(load_records(io.StringIO(u'[{"a": 1}, {"a": 2}]'))), [{'a': 1}, {'a': 2}])
+        self.assertEqual(list(load_records(io.StringIO(u'{"a": 1}'))), [{'a': 1}])
+        self.assertEqual(list(load_records(io.StringIO(u'{"a": 1}\n\n{"a": 2}\n'), ndjson=True)), [{'a': 1}, {'a': 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
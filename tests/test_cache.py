@@ -0,0 +1,146 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.prompters import Options, as_options
+from questionnaire.session import Session
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def validate(self, answer):
+        self.calls.append(('validate', answer))
+        return 'too young' if answer < 18 else None
+
+    def transform(self, answer):
+        self.calls.append(('transform', answer))
+        return answer * 12
+
+    def test_validate_and_transform(self):
+        q = Questionnaire()
+        question = q.raw('age', type=int).cache().validate(self.validate).transform(self.transform)
+        q.raw('name')
+        for age in (30, 10, 30, 40, 30):
+            q.reset()
+            q.submit(age)
+        self.assertEqual(q.answers['age'], 360)
+        self.assertEqual(self.calls, [('validate', 30), ('transform', 30), ('validate', 10),
+                                      ('validate', 40), ('transform', 40)])
+        self.assertEqual((question._cache.hits, question._cache.misses), (4, 5))
+
+        q.listen(lambda event, key, seconds: self.calls.append(event))
+        self.calls = []
+        q.reset()
+        q.submit(40)
+        self.assertEqual(self.calls, [])  # cached results aren't timed
+
+    def test_size(self):
+        q = Questionnaire()
+        question = q.raw('age', type=int).cache(size=2).validate(self.validate)
+        for age in (20, 30, 40, 20):
+            q.reset()
+            q.submit(age)
+        self.assertEqual([answer for _, answer in self.calls], [20, 30, 40, 20])  # 20 was evicted
+        self.assertEqual(len(question._cache.results), 2)
+
+        q = Questionnaire()
+        q.raw('age', type=int).cache(size=0).validate(self.validate)
+        self.calls = []
+        for _ in range(2):
+            q.reset()
+            q.submit(20)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_invalidate(self):
+        q = Questionnaire()
+        question = q.raw('age', type=int).cache().validate(self.validate)
+        for age in (20, 30):
+            q.reset()
+            q.submit(age)
+        question.invalidate(20)
+        for age in (20, 30):
+            q.reset()
+            q.submit(age)
+        self.assertEqual([answer for _, answer in self.calls], [20, 30, 20])
+        question.invalidate()
+        q.reset()
+        q.submit(30)
+        self.assertEqual([answer for _, answer in self.calls], [20, 30, 20, 30])
+
+    def test_unhashable_answers(self):
+        q = Questionnaire()
+        q.many('drinks', 'beer', 'mezcal').cache().validate(lambda a: self.calls.append(a))
+        q.add('misc', prompter=lambda prompt: {}).cache().validate(lambda a: self.calls.append(a))
+        for _ in range(2):
+            q.reset()
+            q.submit(['beer'])
+            q.submit({'a': [1]})
+        self.assertEqual(self.calls, [['beer'], {'a': [1]}])
+
+    def test_options(self):
+        fetched = []
+
+        def options():
+            fetched.append(1)
+            return ['a', 'b', 'c']
+
+        q = Questionnaire()
+        question = q.one('letter', options).cache()
+        self.assertEqual(len(question.prompter_args), 1)
+        self.assertIsInstance(question.prompter_args[0], Options)
+        for _ in range(3):
+            self.assertEqual(len(as_options(question.prompter_args)), 3)
+        self.assertEqual(len(fetched), 1)
+        question.invalidate()
+        self.assertEqual(len(as_options(question.prompter_args)), 3)
+        self.assertEqual(len(fetched), 2)
+
+    def test_prefill(self):
+        q = Questionnaire(show_answers=False)
+        name = q.raw('name', default='bob').cache()
+        day = q.one('day', 'monday', ('fri', 'friday'), 'saturday').cache()
+        drinks = q.many('drinks', 'beer', 'mezcal', 'water').cache()
+        other = q.one('other', 'a', 'b')
+        self.assertEqual(q.prompter_kwargs(name), {'default': 'bob'})
+        self.assertEqual(q.prompter_kwargs(day), {})
+
+        q.submit('alice')
+        q.submit('fri')
+        q.submit(['beer', 'water'])
+        q.submit('b')
+        q.go_back(4)
+        self.assertEqual(q.prompter_kwargs(name), {'default': 'alice'})
+        self.assertEqual(q.get_prompt(name), 'name: [alice] ')
+        self.assertEqual(q.prompter_kwargs(day), {'idx': 1})
+        self.assertEqual(q.prompter_kwargs(drinks), {'default': [0, 2], 'idx': 0})
+        self.assertEqual(q.prompter_kwargs(other), {})
+
+        q.reset()  # nothing is pre-filled in a new run
+        self.assertEqual(q.prompter_kwargs(name), {'default': 'bob'})
+        self.assertEqual(q.prompter_kwargs(day), {})
+
+        q = Questionnaire()
+        name = q.raw('name').cache(prefill=False)
+        q.submit('alice')
+        q.go_back()
+        self.assertEqual(q.prompter_kwargs(name), {})
+
+    def test_prefill_per_session(self):
+        q = Questionnaire()
+        q.raw('name').cache()
+        q.raw('age', type=int).cache().transform(lambda a: a * 12)
+        s, s2 = Session(q.compile()), Session(q.compile())
+        s.submit('alice')
+        s.submit(30)
+        s.go_back(2)
+        s2.submit('bob')
+        self.assertEqual(dict(s.given), {q.questions['name'][0]: 'alice', q.questions['age'][0]: 30})
+        self.assertEqual(dict(s2.given), {q.questions['name'][0]: 'bob'})
+        self.assertEqual(q.session.given, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from questionnaire import Questionnaire
+
+
+def questionnaire(n=3, **kwargs):
+    q = Questionnaire(**kwargs)
+    for i in range(n):
+        q.add('k{}'.format(i), prompter=lambda prompt, i=i: 'v{}'.format(i))
+    return q
+
+
+def history(q):
+    """Answers left after going back one step at a time.
+    """
+    steps = [dict(q.answers)]
+    while q.answers:
+        q.go_back()
+        steps.append(dict(q.answers))
+    return steps
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'answers.ndjson')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_resume(self):
+        q = questionnaire()
+        q.resume(self.path)
+        q.ask()
+        q.ask()
+        q.go_back()
+        q.ask()
+        q.submit('v0_', q.questions['k0'][0])  # overwrites answer, which is restored by going back
+        q.checkpoint(None)
+
+        resumed = questionnaire()
+        resumed.add('k3', prompter=lambda prompt: 'v3')
+        self.assertEqual(list(resumed.resume(self.path).items()), list(q.answers.items()))
+        self.assertEqual(resumed.next_question.key, 'k2')
+        resumed.run()
+        self.assertEqual(dict(resumed.answers), {'k0': 'v0_', 'k1': 'v1', 'k2': 'v2', 'k3': 'v3'})
+        resumed.checkpoint(None)
+
+        resumed = questionnaire()
+        resumed.resume(self.path)
+        self.assertEqual(history(resumed), [
+            {'k0': 'v0_', 'k1': 'v1', 'k2': 'v2', 'k3': 'v3'}, {'k0': 'v0_', 'k1': 'v1', 'k2': 'v2'},
+            {'k0': 'v0_', 'k1': 'v1'}, {'k0': 'v0', 'k1': 'v1'}, {'k0': 'v0'}, {},
+        ])
+
+    def test_order(self):
+        q = questionnaire()
+        q.checkpoint(self.path)
+        q.run()
+        q.submit('v0_', q.questions['k0'][0])
+        q.submit('v1_', q.questions['k1'][0])
+        q.go_back()
+        self.assertEqual(list(q.answers.items()), [('k0', 'v0_'), ('k1', 'v1'), ('k2', 'v2')])
+        q.checkpoint(None)
+
+        for compact_every in (500, 1):
+            resumed = questionnaire()
+            resumed.resume(self.path)
+            self.assertEqual(list(resumed.answers.items()), list(q.answers.items()))
+            resumed.checkpoint(self.path, compact_every=compact_every)  # compacts log
+            resumed.checkpoint(None)
+        resumed.go_back()
+        self.assertEqual(list(resumed.answers.items()), [('k0', 'v0'), ('k1', 'v1'), ('k2', 'v2')])
+
+        q = questionnaire(history_size=2)
+        q.run()
+        q.submit('v0_', q.questions['k0'][0])
+        q.checkpoint(self.path)  # snapshot's `reset` record has first answer to k0
+        q.checkpoint(None)
+        resumed = questionnaire()
+        resumed.resume(self.path)
+        self.assertEqual(list(resumed.answers.items()), [('k0', 'v0_'), ('k1', 'v1'), ('k2', 'v2')])
+
+    def test_delete(self):
+        q = questionnaire()
+        q.checkpoint(self.path)
+        q.run()
+        del q.answers['k1']
+        q.checkpoint(None)
+        for _ in range(2):  # from log, then from compacted log
+            resumed = questionnaire()
+            resumed.resume(self.path)
+            self.assertEqual(list(resumed.answers), ['k0', 'k2'])
+            resumed.checkpoint(self.path)
+            resumed.checkpoint(None)
+        self.assertEqual(history(resumed), [
+            {'k0': 'v0', 'k2': 'v2'}, {'k0': 'v0', 'k1': 'v1', 'k2': 'v2'}, {'k0': 'v0', 'k1': 'v1'},
+            {'k0': 'v0'}, {},
+        ])
+
+    def test_compact(self):
+        q = questionnaire(100)
+        q.checkpoint(self.path, compact_every=10)
+        for _ in range(50):
+            q.ask()
+            q.ask()
+            q.go_back()
+        q.run()
+        q.go_back(90)
+        with open(self.path) as f:
+            self.assertLessEqual(len(f.readlines()), 110)
+
+        resumed = questionnaire(100)
+        resumed.resume(self.path)
+        self.assertEqual(history(resumed), history(q))
+
+    def test_incomplete_record(self):
+        q = questionnaire()
+        q.checkpoint(self.path)
+        q.run()
+        q.checkpoint(None)
+        with open(self.path) as f:
+            log = f.read()
+        with open(self.path, 'w') as f:
+            f.write(log[:-10])
+
+        resumed = questionnaire()
+        self.assertEqual(dict(resumed.resume(self.path)), {'k0': 'v0', 'k1': 'v1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.columns import condition_masks, question_masks
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def questionnaire():
+    q = Questionnaire()
+    q.raw('age', type=int)
+    q.one('plans', 'school', 'work').condition(('age', 18, '>='))
+    q.one('plans', 'work', 'beach').condition(('age', 40, '>='))
+    q.one('plans', 'beach')
+    q.many('drinks', 'beer', 'mezcal').condition(('plans', 'work'), ('age', 30, '!='))
+    q.one('more', 'yes', 'no').condition(('drinks', ['mezcal']))
+    return q
+
+
+TABLE = {
+    'age': [17, 30, 65, None, 50],
+    'plans': ['school', 'work', 'beach', None, 'work'],
+    'drinks': [None, ['beer'], None, None, ['mezcal']],
+}
+
+
+class TestColumns(unittest.TestCase):
+    def test_masks(self):
+        q = questionnaire()
+        masks = condition_masks(q, TABLE)
+        self.assertEqual(masks[('plans', 0)], [False, True, True, False, True])
+        self.assertEqual(masks[('plans', 1)], [False, False, True, False, True])
+        self.assertEqual(masks[('plans', 2)], [True] * 5)
+        self.assertEqual(masks[('drinks', 0)], [False, False, False, False, True])
+        self.assertEqual(masks[('more', 0)], [False, False, False, False, True])
+
+        masks = question_masks(q, TABLE)
+        self.assertEqual(masks[('plans', 1)], [False] * 5)  # everyone who is 40 or older is also 18 or older
+        self.assertEqual(masks[('plans', 2)], [True, False, False, True, False])
+
+    def test_same_as_check_condition(self):
+        q = questionnaire()
+        masks = condition_masks(q, TABLE)
+        for i in range(len(TABLE['age'])):
+            q.answers = {key: column[i] for key, column in TABLE.items() if column[i] is not None}
+            for (key, j), mask in masks.items():
+                condition = q.questions[key][j]._condition
+                try:
+                    satisfied = q.check_condition(condition)
+                except KeyError:
+                    satisfied = False
+                self.assertEqual(mask[i], satisfied)
+
+    @unittest.skipIf(numpy is None, 'requires NumPy')
+    def test_numpy(self):
+        q = questionnaire()
+        table = dict(TABLE, age=numpy.array([17, 30, 65, -1, 50]), plans=numpy.array(TABLE['plans'], dtype=object))
+        masks = condition_masks(q, table)
+        self.assertIsInstance(masks[('plans', 0)], numpy.ndarray)
+        self.assertEqual(masks[('plans', 0)].tolist(), [False, True, True, False, True])
+        self.assertEqual(masks[('drinks', 0)].tolist(), [False, False, False, False, True])
+        self.assertEqual(question_masks(q, table)[('plans', 2)].tolist(), [True, False, False, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
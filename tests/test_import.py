@@ -0,0 +1,28 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import subprocess
+import sys
+import unittest
+
+
+class TestImport(unittest.TestCase):
+    def test_lazy_imports(self):
+        """Importing questionnaire and adding questions doesn't import modules
+        only needed by core prompters or custom operators.
+        """
+        code = '\n'.join([
+            'import sys',
+            'from questionnaire import Questionnaire',
+            'q = Questionnaire()',
+            "q.one('k', 'a', 'b')",
+            "q.raw('k2', secret=True)",
+            "q.add('k3', prompter=lambda prompt: 'v').condition(('k', 'a'))",
+            "modules = ('curses', 'getpass', 'inspect', 'questionnaire.picker')",
+            "print(' '.join(m for m in modules if m in sys.modules))",
+        ])
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.decode().strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import curses
+import unittest
+
+from questionnaire.picker import Picker, FilterIndex, CHECKED
+from questionnaire.prompters import Options
+
+
+class FakeScreen:
+    """Records the rows written by a picker, and feeds it keys.
+    """
+    def __init__(self, keys, height=10, width=40):
+        self.keys = list(keys)
+        self.size = (height, width)
+        self.writes = []
+
+    def getch(self):
+        return self.keys.pop(0)
+
+    def getmaxyx(self):
+        return self.size
+
+    def addnstr(self, y, x, line, n):
+        self.writes.append((y, line[:n]))
+
+    def move(self, y, x):
+        pass
+
+    def clear(self):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def run(picker, keys, **kwargs):
+    picker.screen = FakeScreen(keys, **kwargs)
+    picker.layout()
+    picker.draw()
+    picker.screen.writes = []
+    return picker.run_loop()
+
+
+class TestPicker(unittest.TestCase):
+    def test_one(self):
+        picker = Picker(Options(['a', 'b', 'c']), title='title', indicator='>')
+        self.assertEqual(run(picker, [ord('j'), ord('j'), ord('j'), curses.KEY_UP, ord('\n')]), 2)
+        self.assertEqual(run(Picker(Options(['a']), title='title'), [ord('h')]), None)
+
+    def test_many(self):
+        chosen = {1}
+        picker = Picker(Options(['a', 'b', 'c']), title='title', indicator='>', chosen=chosen)
+        self.assertEqual(run(picker, [ord('\n'), ord('k'), ord(' '), ord('k'), ord(' '), ord('j'), ord('\n')]), 3)
+        self.assertEqual(chosen, {0, 1, 2})
+
+    def test_redraw_changed_rows(self):
+        picker = Picker(Options([str(i) for i in range(100)]), title='title', indicator='>', chosen=set())
+        self.assertEqual(run(picker, [ord(' '), ord('j'), ord('\n'), ord('j'), ord('j'), ord('h')], height=6), None)
+        # title takes 2 rows, leaving 3 rows for options
+        self.assertEqual(picker.screen.writes[:3], [
+            (3, '> {} 0'.format(CHECKED)), (3, '  {} 0'.format(CHECKED)), (4, '>   1')])
+        self.assertEqual(picker.top, 1)
+        self.assertEqual(picker.chosen, {0, 1})
+
+    def test_paging(self):
+        options = Options((str(i) for i in range(1000)), chunk_size=10)
+        picker = Picker(options, title='title', indicator='>')
+        keys = [curses.KEY_NPAGE, curses.KEY_NPAGE, ord('4'), ord('2'), ord('g'), curses.KEY_PPAGE, ord('\n')]
+        self.assertEqual(run(picker, keys, height=12), 32)
+        self.assertEqual(len(options._items), 42)  # only consumed as far as user scrolled
+        self.assertEqual(max(y for y, _ in picker.screen.writes), 11)
+
+        self.assertEqual(run(picker, [ord('9'), ord('9'), ord('9'), ord('9'), ord('G'), ord('\n')], height=12), 999)
+        self.assertEqual(run(picker, [ord('j'), ord('\n')], height=12), 0)  # wrap around
+
+    def test_filter(self):
+        options = Options(['apple', ('b', 'Banana'), 'cherry', 'grape', 'pineapple'])
+        index = FilterIndex(options)
+        self.assertEqual(index.search('a'), [0, 1, 3, 4])
+        self.assertEqual(index.search('ap'), [0, 3, 4])
+        self.assertEqual(index.search('APP'), [0, 4])
+        self.assertEqual(index.search('a'), [0, 1, 3, 4])
+        self.assertEqual(FilterIndex(options).search('eap'), [4])  # trigram candidates
+        self.assertEqual(index.search(''), None)
+
+        keys = [ord('/'), ord('a'), ord('p'), curses.KEY_DOWN, ord('\n')]
+        self.assertEqual(run(Picker(options, title='title'), keys), 3)
+
+        chosen = {2}
+        picker = Picker(options, title='title', chosen=chosen)
+        keys = [ord('/'), ord('n'), ord('a'), ord('\n'), 27, ord('G'), ord('\n')]
+        self.assertEqual(run(picker, keys), 5)
+        self.assertEqual(chosen, {1, 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from questionnaire import Questionnaire
+from questionnaire.stream import read_answers
+
+
+class TestPrefill(unittest.TestCase):
+    def setUp(self):
+        self.asked = []
+
+    def prompter(self, answer):
+        def prompter(prompt):
+            self.asked.append(prompt.split(':')[0])
+            return answer
+        return prompter
+
+    def questionnaire(self):
+        q = Questionnaire(show_answers=False)
+        q.add('name', prompter=self.prompter('bob'))
+        q.add('age', prompter=self.prompter('30')).validate(
+            lambda a: None if a.isdigit() else 'not a number').transform(int)
+        q.add('drink', prompter=self.prompter('juice')).condition(('age', 18, '>'))  # 18 > age
+        q.add('drink', prompter=self.prompter('beer'))
+        q.add('city', prompter=self.prompter('paris'))
+        q.add('street', prompter=self.prompter('rue')).condition(('city', 'paris'))
+        return q
+
+    def test_prefill(self):
+        q = self.questionnaire()
+        rejected = q.prefill({'street': 'main', 'drink': 'mezcal', 'age': '40', 'zip': '10001'})
+        self.assertEqual(dict(rejected), {'zip': 'no question for key',
+                                          'street': "condition reads 'city', which has no answer"})
+        self.assertEqual(list(q.answers.items()), [('age', 40), ('drink', 'mezcal')])
+        q.run()
+        self.assertEqual(self.asked, ['name', 'city', 'street'])
+        self.assertEqual(dict(q.answers), {'name': 'bob', 'age': 40, 'drink': 'mezcal', 'city': 'paris',
+                                           'street': 'rue'})
+
+    def test_rejected(self):
+        q = self.questionnaire()
+        q.prefill({'name': 'alice'})
+        rejected = q.prefill({'name': 'eve', 'age': 'forty', 'drink': 'mezcal', 'city': 'rome', 'street': 'via'})
+        self.assertEqual(dict(rejected), {
+            'name': 'already answered',
+            'age': 'invalid answer: not a number',
+            'drink': "condition reads 'age', which has no answer",
+            'street': 'not asked, no condition is satisfied',
+        })
+        self.assertEqual(dict(q.answers), {'name': 'alice', 'city': 'rome'})
+        q.run()
+        self.assertEqual(self.asked, ['age', 'drink'])
+
+    def test_only_asked_question_validates(self):
+        validated = []
+
+        def validate(name):
+            return lambda answer: validated.append((name, answer))
+
+        q = Questionnaire()
+        q.raw('age', type=int).validate(validate('age'))
+        q.raw('drink').condition(('age', 18, '>')).validate(validate('juice'))  # 18 > age
+        q.raw('drink').validate(validate('beer'))
+        q.raw('city').validate(validate('city'))
+        rejected = q.prefill({'age': '40', 'drink': 'mezcal', 'city': 'paris'})
+        self.assertEqual(rejected, {})
+        self.assertEqual(sorted(validated), [('age', 40), ('beer', 'mezcal'), ('city', 'paris')])
+
+    def test_coerce(self):
+        q = Questionnaire()
+        q.raw('age', type=int)
+        q.one('day', 'monday', 'friday')
+        q.many('drinks', 'beer', 'mezcal')
+        q.raw('city', default='paris')
+        rejected = q.prefill({'age': '40', 'day': 'sunday', 'drinks': ['mezcal', 'beer'], 'city': ''})
+        self.assertEqual(dict(rejected), {'day': 'invalid answer: `sunday` is not one of the options'})
+        self.assertEqual(dict(q.answers), {'age': 40, 'drinks': ['beer', 'mezcal'], 'city': 'paris'})
+        self.assertEqual(q.prefill({'day': 'friday'}), {})
+        self.assertEqual(list(q.answers), ['age', 'drinks', 'city', 'day'])
+
+    def test_go_back_and_stream(self):
+        q = self.questionnaire()
+        f = StringIO()
+        q.stream_answers(f)
+        q.prefill({'name': 'alice', 'age': '12'})
+        self.assertEqual(q.next_question.prompter(''), 'juice')
+        q.go_back()
+        self.assertEqual(list(q.answers), ['name'])
+        self.assertEqual(dict(read_answers(f.getvalue().splitlines())), {'name': 'alice'})
+
+    def test_checkpoint(self):
+        path = os.path.join(tempfile.mkdtemp(), 'answers.ndjson')
+        q = self.questionnaire()
+        q.checkpoint(path)
+        q.prefill({'name': 'alice', 'age': '12', 'city': 'rome'})
+        q.checkpoint(None)
+
+        q = self.questionnaire()
+        q.resume(path)
+        self.assertEqual(dict(q.answers), {'name': 'alice', 'age': 12, 'city': 'rome'})
+        q.go_back()
+        self.assertEqual(list(q.answers), ['name', 'age'])
+        shutil.rmtree(os.path.dirname(path))
+
+    def test_parallel_validators(self):
+        threads = set()
+
+        def validate(answer):
+            threads.add(threading.current_thread())
+            time.sleep(0.1)
+
+        q = Questionnaire()
+        for i in range(8):
+            q.add('k{}'.format(i), prompter=self.prompter('v')).validate(validate)
+        start = time.time()
+        q.prefill({'k{}'.format(i): 'v' for i in range(8)})
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(len(threads), 8)
+        self.assertTrue(q.done)
+
+        threads.clear()
+        q.reset()
+        q.prefill({'k0': 'v', 'k1': 'v'}, workers=1)
+        self.assertEqual(threads, {threading.current_thread()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,19 @@
 import unittest
 from random import randrange
 
-from questionnaire import Questionnaire
+import json
+import pickle
+import threading
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import questionnaire
+from questionnaire import Questionnaire, Question, QuestionnaireInvalidAnswer, Options, Session, register_operator
 from questionnaire.prompters import QuestionnaireGoBack
+from questionnaire.stream import read_answers
+from questionnaire.timing import Timings
 
 
 class TestQuestionnaire(unittest.TestCase):
@@ -26,6 +37,10 @@ class TestQuestionnaire(unittest.TestCase):
         q.ask()
         self.assertEqual(q.answers['k3'], -1)
 
+        with self.assertRaises(ValueError) as cm:
+            q.submit('v')
+        self.assertEqual(str(cm.exception), 'no question left to answer')
+
         q.reset()
         self.assertEqual(dict(q.answers), {})
 
@@ -65,6 +80,354 @@ class TestQuestionnaire(unittest.TestCase):
         q.run()
         self.assertEqual(dict(q.answers), {'k': 'v'})
 
+    def test_next_question_index(self):
+        def scan(q):
+            for key, questions in q.questions.items():
+                if key in q.answers:
+                    continue
+                for question in questions:
+                    if q.check_condition(question._condition):
+                        return question
+
+        q = Questionnaire()
+        q.add('a', prompter=lambda prompt: randrange(3))
+        for i in range(30):
+            key = 'k{}'.format(i % 10)
+            q.add(key, prompter=lambda prompt: randrange(3)).condition(('a', randrange(3)))
+            q.add(key, prompter=lambda prompt: randrange(3)).condition(('a', randrange(3), '!='))
+        for _ in range(50):
+            self.assertIs(q.next_question, scan(q))
+            if q.done or randrange(4) == 0:
+                q.go_back(randrange(1, 4))
+            else:
+                q.ask()
+
+        q.reset()
+        self.assertIs(q.next_question, scan(q))
+        q.ask()
+        q.remove('k0')
+        self.assertIs(q.next_question, scan(q))
+
+    def test_redo(self):
+        q = Questionnaire(history_size=2)
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2')
+        q.add('k3', prompter=lambda prompt: 'v3').condition(('k2', 'v2'))
+        q.run()
+
+        q.go_back(3)
+        self.assertEqual(dict(q.answers), {})
+        self.assertEqual(q.redo(5), 2)  # only `history_size` entries are kept
+        self.assertEqual(list(q.answers.items()), [('k', 'v'), ('k2', 'v2')])
+        self.assertEqual(q.redo(), 0)
+
+        q.go_back(1)
+        q.ask()
+        self.assertEqual(q.redo(), 0)  # answering clears the redo stack
+
+        q.go_back(1)
+        q.remove('k2')
+        q.remove('k3')
+        q.add('k2', prompter=lambda prompt: 'v2_')
+        self.assertEqual(q.redo(), 0)  # answer was given to a different question
+        self.assertEqual(q.answers.get('k2'), None)
+
+    def test_answer_display(self):
+        q = Questionnaire(max_answers_shown=2)
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2')
+        q.add('k3', prompter=lambda prompt: 'v3')
+        q.run()
+        self.assertEqual(q.answer_display(), '     k2 : v2\n     k3 : v3\n')
+
+        q.max_answers_shown = None
+        q.go_back()
+        self.assertEqual(q.answer_display(), '      k : v\n     k2 : v2\n')
+        q.add('key', prompter=lambda prompt: 'v4')
+        self.assertEqual(q.answer_display(), '       k : v\n      k2 : v2\n')
+        q.remove('key')
+        self.assertEqual(q.answer_display('> '), '>       k : v\n     k2 : v2\n')
+
+    def test_prefetch(self):
+        fetched = threading.Event()
+
+        def fetch():
+            fetched.set()
+            return ['a', 'b']
+
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: 'v')
+        q.one('k2', fetch).condition(('k', 'v'))
+        self.assertIsInstance(q.questions['k2'][0].prompter_args[0], Options)
+        q.ask()  # `k2` isn't prefetched, because its condition depends on `k`
+        self.assertFalse(fetched.is_set())
+
+        fetched.clear()
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: fetched.wait(1) and 'v')
+        q.one('k2', fetch)
+        q.ask()  # options for `k2` are fetched while `k` is being answered
+        self.assertEqual(q.answers['k'], 'v')
+
+    def test_change_questions_after_compiling(self):
+        q = Questionnaire()
+        q.add('a', prompter=lambda prompt: 'x')
+        b = q.add('b', prompter=lambda prompt: 'y')
+        q.next_question
+        b.condition(('a', 'z'))
+        self.assertEqual(dict(q.run()), {'a': 'x'})
+
+        q.questions['c'] = [Question('c', prompter=lambda prompt: 'w')]
+        q.questions['b'].append(Question('b', prompter=lambda prompt: 'v'))
+        self.assertEqual(dict(q.run()), {'a': 'x', 'b': 'v', 'c': 'w'})
+        del q.questions['c']
+        q.questions['b'][1:] = []
+        q.reset()
+        self.assertEqual(dict(q.run()), {'a': 'x'})
+
+    def test_options_function_fails(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                raise IOError('network is down')
+            return ['a', 'b']
+
+        options = Options(fetch)
+        options.prefetch()
+        with self.assertRaises(IOError):
+            options.has(0)
+        self.assertEqual(len(options), 2)  # function is called again
+        self.assertEqual(len(calls), 2)
+
+    def test_refetch_options(self):
+        q = Questionnaire()
+        q.add('user', prompter=lambda prompt: 'v')
+        q.add('pass', prompter=lambda prompt: 'v')
+        q.one('repo', lambda: ['{}/repo'.format(q.answers['user'])]).condition(('pass', '', '!='))
+        q.submit('alice')
+        q.submit('pw')
+        options = q.prompter_args(q.next_question)[0]
+        self.assertEqual(options.value(0), 'alice/repo')
+        q.go_back(2)
+        q.submit('bob')
+        q.submit('pw')
+        options = q.prompter_args(q.next_question)[0]
+        self.assertEqual(options.value(0), 'bob/repo')
+        q.submit(options.value(0))
+        self.assertEqual(q.answers['repo'], 'bob/repo')
+
+    def test_options_per_session(self):
+        fetched = []
+        q = Questionnaire()
+        q.add('user', prompter=lambda prompt: 'v')
+        q.one('repo', lambda: fetched.append(1) or ['repo']).condition(('user', '', '!='))
+        definition = q.compile()
+        self.assertEqual(list(definition.refetched), ['user'])
+
+        s, s2 = Session(definition), Session(definition)
+        s.submit('alice')
+        s2.submit('bob')
+        options, options2 = s.prompter_args(s.next_question)[0], s2.prompter_args(s2.next_question)[0]
+        self.assertIsNot(options, options2)
+        self.assertEqual((options.value(0), options2.value(0), len(fetched)), ('repo', 'repo', 2))
+        s2.go_back()
+        s2.submit('eve')  # only drops options fetched by s2
+        self.assertIs(s.prompter_args(s.next_question)[0], options)
+        self.assertEqual(s2.prompter_args(s2.next_question)[0].value(0), 'repo')
+        self.assertEqual(len(fetched), 3)
+        self.assertFalse(definition.questions[1][0].prompter_args[0].fetched)  # shared options are never fetched
+
+    def test_sessions(self):
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2').condition(('k', 'v'))
+        q.add('k2', prompter=lambda prompt: 'v2_').condition(('k', 'v_'))
+        definition = q.compile()
+        self.assertIs(q.compile(), definition)
+
+        s, s2 = Session(definition), Session(definition)
+        s.submit('v')
+        s2.submit('v_')
+        self.assertEqual(s.next_question.prompter(''), 'v2')
+        self.assertEqual(s2.next_question.prompter(''), 'v2_')
+        self.assertIsNone(s.submit('v2'))
+        self.assertEqual(dict(s.answers), {'k': 'v', 'k2': 'v2'})
+        self.assertIsNone(s.next_question)
+        self.assertFalse(hasattr(s, '__dict__'))
+
+        q.run()
+        self.assertEqual(dict(q.answers), {'k': 'v', 'k2': 'v2'})
+        q.add('k3', prompter=lambda prompt: 'v3')
+        self.assertIsNot(q.compile(), definition)
+        self.assertEqual(q.next_question.key, 'k3')
+
+    def test_retries(self):
+        errors = []
+        q = Questionnaire(on_error=lambda question, answer, error: errors.append((question.key, answer, error)))
+        q.add('k', prompter=lambda prompt: 'v').validate(lambda a: 'invalid')
+        q.max_retries = 2000  # more than the recursion limit
+        with self.assertRaises(QuestionnaireInvalidAnswer) as cm:
+            q.ask()
+        self.assertEqual(cm.exception.args, ('k', 'invalid'))
+        self.assertEqual(len(errors), 2001)
+        self.assertEqual(errors[0], ('k', 'v', 'invalid'))
+
+        def go_back(prompt):
+            raise QuestionnaireGoBack(0)
+        q = Questionnaire(can_go_back=False, max_retries=0)
+        answers = iter([None] * 2000 + ['v'])
+        q.add('k', prompter=lambda prompt: next(answers) or go_back(prompt))  # redo question 2000 times
+        self.assertEqual(q.ask(), 'v')
+
+    def test_listeners(self):
+        q = Questionnaire()
+        answers = iter(['v_', 'v'])
+        q.add('k', prompter=lambda prompt: next(answers)).validate(lambda a: None if a == 'v' else 'error')
+        q.add('k2', prompter=lambda prompt: 'v2').transform(lambda a: a.upper())
+        trace = StringIO()
+        timings = q.listen(Timings(trace=trace))
+        events = []
+        q.listen(lambda event, key, seconds: events.append((event, key)))
+        q.run()
+
+        self.assertEqual(events, [
+            ('next_question', 'k'), ('next_question', 'k'), ('prompt', 'k'), ('validate', 'k'),
+            ('next_question', 'k'), ('prompt', 'k'), ('validate', 'k'), ('ask', 'k'),
+            ('next_question', 'k2'), ('next_question', 'k2'), ('prompt', 'k2'), ('transform', 'k2'), ('ask', 'k2'),
+            ('next_question', None),
+        ])
+        counts = {(s['key'], s['event']): s['count'] for s in timings.summary()}
+        self.assertEqual(counts[('k', 'prompt')], 2)
+        self.assertEqual(counts[('k2', 'transform')], 1)
+        lines = [json.loads(line) for line in trace.getvalue().splitlines()]
+        self.assertEqual([(line['event'], line['key']) for line in lines], events)
+        self.assertTrue(all(line['seconds'] >= 0 for line in lines))
+        with self.assertRaises(ValueError):  # no question left to answer
+            q.submit('v')
+
+    def test_stream_answers(self):
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2')
+        q.add('k3', prompter=lambda prompt: 'v3')
+        f = StringIO()
+        q.stream_answers(f)
+        q.ask()
+        q.ask()
+        q.go_back()
+        q.run()
+        records = [json.loads(line) for line in f.getvalue().splitlines()]
+        self.assertEqual([(r['seq'], r['op'], r['key'], r.get('value')) for r in records], [
+            (1, 'answer', 'k', 'v'), (2, 'answer', 'k2', 'v2'), (3, 'retract', 'k2', None),
+            (4, 'answer', 'k2', 'v2'), (5, 'answer', 'k3', 'v3'),
+        ])
+
+        q.submit('v_', q.questions['k'][0])
+        q.go_back()  # restores answer to k in its position
+        self.assertEqual(list(read_answers(f.getvalue().splitlines()).items()), list(q.answers.items()))
+
+        q.answers = {'k': 'v_'}
+        self.assertEqual(json.loads(f.getvalue().splitlines()[8])['op'], 'reset')
+        self.assertEqual(read_answers(f.getvalue().splitlines()), {'k': 'v_'})
+        q.stream_answers(None)
+        q.run()
+        self.assertEqual(len(f.getvalue().splitlines()), 9)
+
+    def test_set_answers(self):
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2')
+        q.answers = {'k': 'v_'}
+        self.assertIs(q.answers, q.session.answers)
+        self.assertEqual(dict(q.run()), {'k': 'v_', 'k2': 'v2'})
+
+    def test_operators(self):
+        def contains(answer, value):
+            return value in answer
+        register_operator('contains', contains)
+        self.assertIn(contains, questionnaire._valid_operators)
+
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: ['a', 'b'])
+        q.add('k2', prompter=lambda prompt: 'v2').condition(('k', 'a', 'contains'))
+        q.add('k3', prompter=lambda prompt: 'v3').condition(('k', 'c', contains), ('k', 1, lambda a, v: len(a) > v))
+        q.run()
+        self.assertEqual(list(q.answers), ['k', 'k2'])
+
+        with self.assertRaises(TypeError):
+            q.add('k4', prompter=lambda prompt: 'v4').condition(('k', 'a', lambda a: a))
+        with self.assertRaises(KeyError):
+            q.add('k4', prompter=lambda prompt: 'v4').condition(('k', 'a', 'not_registered'))
+
+    def test_change_answers_directly(self):
+        q = Questionnaire()
+        q.add('k', prompter=lambda prompt: 'v')
+        q.add('k2', prompter=lambda prompt: 'v2').condition(('k', 'v'))
+        q.run()
+        del q.answers['k']
+        self.assertEqual(q.next_question.key, 'k')
+        q.answers['k'] = 'v'
+        q.answers.pop('k2')
+        self.assertEqual(q.next_question.key, 'k2')
+        q.answers['k'] = 'v_'
+        self.assertIsNone(q.next_question)
+        q.answers.clear()
+        self.assertEqual(q.next_question.key, 'k')
+        q.answers.update(k='v', k2='v2')
+        self.assertIsNone(q.next_question)
+        display = q.answer_display()
+        q.answers['k2'] = 'changed'
+        self.assertNotEqual(q.answer_display(), display)  # display isn't stale
+
+    def test_undo_direct_changes(self):
+        q = Questionnaire()
+        for key in 'abc':
+            q.add(key, prompter=lambda prompt, key=key: key.upper())
+        q.run()
+        del q.answers['c']
+        q.go_back()  # undoes deletion
+        self.assertEqual(list(q.answers.items()), [('a', 'A'), ('b', 'B'), ('c', 'C')])
+        del q.answers['c']
+        q.go_back(2)
+        self.assertEqual(list(q.answers.items()), [('a', 'A'), ('b', 'B')])
+        self.assertEqual(q.redo(), 1)
+        self.assertEqual(list(q.answers.items()), [('a', 'A'), ('b', 'B'), ('c', 'C')])
+
+        q.answers['x'] = 1
+        q.go_back()
+        self.assertEqual(list(q.answers), ['a', 'b', 'c'])
+        q.answers.clear()
+        q.go_back(3)
+        self.assertEqual(list(q.answers), ['a', 'b', 'c'])
+        f = StringIO()
+        q.stream_answers(f)
+        del q.answers['b']
+        self.assertEqual(list(read_answers(f.getvalue().splitlines())), ['a', 'c'])
+
+    def test_compact_questions(self):
+        q = Questionnaire()
+        days = q.options('monday', 'friday')
+        self.assertIs(q.options('monday', 'friday'), days)
+        questions = [q.one('k{}'.format(i), 'a', ('b', 'B'), prompt='Pick one') for i in range(3)]
+        questions += [q.one('d{}'.format(i), days).condition(('k0', 'a')) for i in range(2)]
+        self.assertIs(questions[0].prompter_args, questions[2].prompter_args)
+        self.assertIs(questions[3].prompter_args, questions[4].prompter_args)
+        self.assertIs(questions[0].prompt, questions[1].prompt)
+        self.assertIs(questions[3]._condition.conditions[0].key, questions[0].key)
+        for obj in (questions[0], questions[3]._condition):
+            self.assertFalse(hasattr(obj, '__dict__'))
+
+        q.one('t', True, False)
+        q.one('n', 1, 0)
+        self.assertEqual(q.questions['n'][0].prompter_args, (1, 0))
+        self.assertIs(type(q.questions['n'][0].prompter_args[0]), int)  # not shared with equal options
+
+        copy = pickle.loads(pickle.dumps(q, 2))
+        self.assertEqual(copy.questions['d1'][0]._condition.conditions, questions[4]._condition.conditions)
+        self.assertIs(copy.questions['d0'][0].prompter_args, copy.questions['d1'][0].prompter_args)
+
 
 if __name__ == '__main__':
     unittest.main()
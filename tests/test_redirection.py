@@ -0,0 +1,112 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from questionnaire import Questionnaire
+from questionnaire.prompters import StdoutRedirection, QuestionnaireGoBack
+
+
+class TestStdoutRedirection(unittest.TestCase):
+    def setUp(self):
+        self.streams = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = tempfile.TemporaryFile('w+'), tempfile.TemporaryFile('w+')
+        self.redirection = StdoutRedirection()
+
+    def tearDown(self):
+        out, err = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = self.streams
+        out.close()
+        err.close()
+
+    def output(self):
+        result = []
+        for f in (sys.stdout, sys.stderr):
+            f.flush()
+            f.seek(0)
+            result.append(f.read())
+        return result
+
+    def test_redirect(self):
+        print('out')
+        with self.redirection:
+            print('redirected')
+            with self.redirection:
+                print('nested')
+            print('still redirected')
+        print('restored')
+        self.assertEqual(self.output(), ['out\nrestored\n', 'redirected\nnested\nstill redirected\n'])
+        self.assertEqual((self.redirection.depth, self.redirection.saved), (0, None))
+
+    def test_held(self):
+        dups = []
+        dup = os.dup
+        os.dup = lambda fd: dups.append(fd) or dup(fd)
+        try:
+            with self.redirection.held():
+                print('not redirected yet')
+                for i in range(3):
+                    with self.redirection:
+                        print('prompt {}'.format(i))
+                    print('between {}'.format(i))
+                with self.redirection.suspended():
+                    print('suspended')
+            print('restored')
+        finally:
+            os.dup = dup
+        self.assertEqual(len(dups), 1)
+        out, err = self.output()
+        self.assertEqual(out, 'not redirected yet\nsuspended\nrestored\n')
+        self.assertEqual(err, 'prompt 0\nbetween 0\nprompt 1\nbetween 1\nprompt 2\nbetween 2\n')
+
+    def test_exceptions(self):
+        for exception in (QuestionnaireGoBack, KeyboardInterrupt):
+            with self.assertRaises(exception):
+                with self.redirection.held():
+                    with self.redirection:
+                        raise exception
+            print('restored')
+        self.assertEqual(self.output(), ['restored\nrestored\n', ''])
+        self.assertFalse(self.redirection.redirected)
+
+    def test_stream_to_file(self):
+        from questionnaire.prompters import stdout_redirection
+        from questionnaire.stream import AnswerStream
+
+        dups = []
+        dup2 = os.dup2
+        os.dup2 = lambda fd, fd2: dups.append(fd) or dup2(fd, fd2)
+        try:
+            with tempfile.TemporaryFile('w+') as f:
+                with stdout_redirection:
+                    dups[:] = []
+                    AnswerStream(f).answer('a', 1)  # stdout stays redirected
+                    self.assertEqual(dups, [])
+                    AnswerStream(sys.stdout).answer('a', 1)
+                    self.assertEqual(len(dups), 2)  # restored while record is written
+        finally:
+            os.dup2 = dup2
+
+    def test_run(self):
+        from questionnaire.prompters import stdout_redirection
+
+        def prompter(prompt, *args, **kwargs):
+            with stdout_redirection:
+                print(prompt)
+            return 'answer'
+
+        q = Questionnaire(show_answers=False)
+        q.stream_answers(sys.stdout)
+        q.add('a', prompter=prompter)
+        q.add('b', prompter=prompter)
+        q.run()
+        out, err = self.output()
+        self.assertEqual(len(out.splitlines()), 2)  # streamed answers
+        self.assertEqual(err.split(), ['a:', 'b:'])
+        self.assertEqual(stdout_redirection.depth, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
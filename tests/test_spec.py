@@ -0,0 +1,115 @@
+"""Usage: from repo root, run `python -m unittest discover -v`
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from questionnaire import spec, register_operator, operators
+from questionnaire.batch import replay
+from questionnaire.spec import build, load, SpecError
+
+
+SPEC = {
+    'max_answers_shown': 3,
+    'questions': [
+        {'key': 'day', 'prompter': 'one', 'options': ['monday', 'friday']},
+        {'key': 'time', 'prompter': 'one', 'options': [['am', 'morning'], ['pm', 'night']]},
+        {'key': 'drink', 'prompter': 'many', 'options': ['beer', 'mezcal'],
+         'condition': [['time', 'pm'], ['day', 'monday', '!=']]},
+        {'key': 'age', 'prompter': 'raw', 'prompt': 'How old are you?', 'type': 'int', 'default': 18},
+    ],
+}
+
+
+class TestSpec(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build(self):
+        q = build(SPEC)
+        self.assertEqual(q.max_answers_shown, 3)
+        self.assertEqual(q.questions['time'][0].prompter_args, (('am', 'morning'), ('pm', 'night')))
+        self.assertEqual(q.questions['age'][0].prompter_kwargs, {'type': int, 'default': 18})
+        self.assertEqual(q.questions['age'][0].prompt, 'How old are you? [18] ')
+        self.assertEqual(dict(replay(q, {'day': 'friday', 'time': 'pm', 'drink': ['beer'], 'age': 30})),
+                         {'day': 'friday', 'time': 'pm', 'drink': ['beer'], 'age': 30})
+        self.assertEqual(dict(replay(q, {'day': 'monday', 'time': 'pm', 'age': 30})),
+                         {'day': 'monday', 'time': 'pm', 'age': 30})
+        self.assertEqual(SPEC['questions'][1]['options'], [['am', 'morning'], ['pm', 'night']])
+
+    def test_errors(self):
+        for questions, error in [
+            ([{'prompter': 'raw'}], 'questions[0]: key must be'),
+            ([{'key': 'k', 'prompter': 'pick'}], 'questions[0] (k): prompter must be'),
+            ([{'key': 'k', 'prompter': 'one'}], 'options must be'),
+            ([{'key': 'k', 'prompter': 'one', 'options': [['a']]}], 'options[0] must be'),
+            ([{'key': 'k', 'prompter': 'raw', 'type': 'list'}], 'type must be'),
+            ([{'key': 'k', 'prompter': 'raw', 'condition': [['k2', 'v']]}], "unknown key 'k2'"),
+            ([{'key': 'k', 'prompter': 'raw', 'condition': [['k', 'v', '~']]}], 'operator must be'),
+        ]:
+            with self.assertRaises(SpecError) as cm:
+                build(questions)
+            self.assertIn(error, str(cm.exception))
+
+    def test_load_cached(self):
+        path = os.path.join(self.directory, 'spec.json')
+        with open(path, 'w') as f:
+            json.dump(SPEC, f)
+        cache_dir = os.path.join(self.directory, 'cache')
+        q = load(path, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        q.submit('friday', q.next_question)
+
+        build, spec.build = spec.build, None  # spec is loaded from cache without building it
+        try:
+            cached = load(path, cache_dir=cache_dir)
+        finally:
+            spec.build = build
+        self.assertIsNot(cached, q)
+        self.assertEqual(list(cached.questions), list(q.questions))
+        self.assertEqual(cached.max_answers_shown, 3)
+        self.assertEqual(dict(cached.answers), {})  # session isn't cached
+        self.assertEqual(cached.next_question.key, 'day')
+        self.assertEqual(dict(replay(cached, {'day': 'friday', 'time': 'am', 'age': 30})),
+                         {'day': 'friday', 'time': 'am', 'age': 30})
+
+        with open(path, 'a') as f:
+            f.write('\n')
+        load(path, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        digest = spec.package_digest()
+        spec._package_digest[:] = ['other']  # questionnaires cached by another version of the package aren't loaded
+        try:
+            load(path, cache_dir=cache_dir)
+        finally:
+            spec._package_digest[:] = [digest]
+        self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+    def test_load_registered_operator(self):
+        path = os.path.join(self.directory, 'spec.json')
+        with open(path, 'w') as f:
+            json.dump([{'key': 'n', 'prompter': 'raw', 'type': 'int'},
+                       {'key': 'big', 'prompter': 'raw', 'condition': [['n', 10, 'lte']]}], f)
+        cache_dir = os.path.join(self.directory, 'cache')
+        register_operator('lte', lambda answer, value: answer <= value)
+        try:
+            for _ in range(2):  # built and cached, then loaded from cache
+                q = load(path, cache_dir=cache_dir)
+                self.assertEqual(dict(replay(q, {'n': 10, 'big': 'yes'})), {'n': 10, 'big': 'yes'})
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            register_operator('lte', lambda answer, value: answer < value)
+            q = load(path, cache_dir=cache_dir)
+            self.assertEqual(dict(replay(q, {'n': 10})), {'n': 10})
+        finally:
+            operators.pop('lte', None)
+
+
+if __name__ == '__main__':
+    unittest.main()